@@ -0,0 +1,114 @@
+"""
+Бенчмарк формата записи заказа в кэше: прежний Redis hash (все поля строками,
+items — JSON внутри поля, HSET + EXPIRE) против одной строки SET ... EX
+с телом в выбранном кодеке.
+
+Размер — байты полезных данных записи (для hash — сумма имён и значений полей),
+время — процессорное время на кодирование/декодирование одной записи.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_order_cache_codec
+"""
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from src.core.etag import order_etag
+from src.db.models.order import Order, OrderStatus
+from src.db.models.user import User  # noqa: F401 — нужен мапперу для Order.user
+from src.db.redis import redis_utils
+from src.db.redis.codec import CODECS, msgpack
+from src.db.redis.redis_utils import order_to_dict, _iso, _to_cache_payload
+
+ITERATIONS = 5000
+ITEMS_PER_ORDER = (1, 5, 20)
+
+
+def make_order(items: int) -> Order:
+    now = datetime.now(timezone.utc)
+    return Order(
+        id=uuid.uuid4(),
+        user_id=1,
+        items=[
+            {"product_id": f"p{i}", "name": f"Product {i}", "quantity": i + 1, "price": 9.99, "total": 9.99 * (i + 1)}
+            for i in range(items)
+        ],
+        total_price=59.94,
+        status=OrderStatus.PENDING,
+        created_at=now,
+        updated_at=now,
+        version=1,
+    )
+
+
+# Прежний формат (до v2) — воспроизведён здесь только для сравнения
+def legacy_encode(order_id: str, order_data: dict) -> Dict[str, str]:
+    return {
+        "id": order_id,
+        "user_id": str(order_data["user_id"]),
+        "items": json.dumps(order_data["items"]),
+        "total_price": str(order_data["total_price"]),
+        "status": order_data["status"].value,
+        "created_at": _iso(order_data["created_at"]),
+        "updated_at": _iso(order_data["updated_at"]),
+        "version": str(order_data["version"]),
+        "etag": order_etag(order_data["version"]),
+        "expires_at": str(time.time() + 300),
+        "delta": "0.0",
+    }
+
+
+def legacy_decode(order_id: str, data: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "id": order_id,
+        "user_id": int(data["user_id"]),
+        "items": json.loads(data["items"]),
+        "total_price": float(data["total_price"]),
+        "status": data["status"],
+        "created_at": data["created_at"],
+        "updated_at": data["updated_at"],
+        "version": int(data["version"]),
+        "etag": data["etag"],
+        "expires_at": float(data["expires_at"]),
+        "delta": float(data["delta"]),
+    }
+
+
+def cpu_per_call(func) -> float:
+    """Процессорное время на вызов, мкс"""
+    func()  # прогрев
+    started = time.process_time()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.process_time() - started) / ITERATIONS * 1_000_000
+
+
+def main() -> None:
+    codec_names = [name for name in CODECS if name != "msgpack" or msgpack is not None]
+
+    print(f"{'format':<12}{'items':>6}{'bytes':>8}{'encode, us':>12}{'decode, us':>12}")
+    for items in ITEMS_PER_ORDER:
+        order = make_order(items)
+        order_id = str(order.id)
+        order_data = order_to_dict(order)
+
+        mapping = legacy_encode(order_id, order_data)
+        size = sum(len(field) + len(value.encode("utf-8")) for field, value in mapping.items())
+        encode_us = cpu_per_call(lambda: legacy_encode(order_id, order_data))
+        decode_us = cpu_per_call(lambda: legacy_decode(order_id, mapping))
+        print(f"{'hash':<12}{items:>6}{size:>8}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+        for name in codec_names:
+            redis_utils._codec = CODECS[name]()
+            entry = redis_utils._encode_entry(_to_cache_payload(order_id, order_data, 300))
+            encode_us = cpu_per_call(
+                lambda: redis_utils._encode_entry(_to_cache_payload(order_id, order_data, 300))
+            )
+            decode_us = cpu_per_call(lambda: redis_utils._decode_entry(order_id, entry))
+            print(f"{name:<12}{items:>6}{len(entry):>8}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Бенчмарк сериализации заказов: старый путь FastAPI (модель -> повторная
+валидация response_model -> jsonable-представление -> json.dumps) против
+предкомпилированных TypeAdapter'ов и готовых JSON-байтов.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_serialization
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.db.models.order import Order, OrderStatus
+from src.db.models.user import User  # noqa: F401 — нужен мапперу для Order.user
+from src.db.redis.redis_utils import order_to_dict, _to_cache_payload, _encode_entry, _decode_entry
+from src.schemas.response.order import OrderResponse
+from src.schemas.serializers import dump_order, dump_cached_order, dump_order_page
+
+ITERATIONS = 2000
+LIST_SIZE = 50
+
+
+def make_order() -> Order:
+    now = datetime.now(timezone.utc)
+    return Order(
+        id=uuid.uuid4(),
+        user_id=1,
+        items=[
+            {"product_id": f"p{i}", "name": f"Product {i}", "quantity": i + 1, "price": 9.99, "total": 9.99 * (i + 1)}
+            for i in range(3)
+        ],
+        total_price=59.94,
+        status=OrderStatus.PENDING,
+        created_at=now,
+        updated_at=now,
+        version=1,
+    )
+
+
+def cpu_per_call(func) -> float:
+    """Процессорное время на вызов, мкс"""
+    func()  # прогрев
+    started = time.process_time()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.process_time() - started) / ITERATIONS * 1_000_000
+
+
+def main() -> None:
+    loop = asyncio.new_event_loop()
+    order_field = create_model_field("Response", OrderResponse, mode="serialization")
+    list_field = create_model_field("Response", list[OrderResponse], mode="serialization")
+
+    def fastapi_render(field, content) -> bytes:
+        """То, что делает FastAPI с возвращённым значением при заданном response_model"""
+        jsonable = loop.run_until_complete(
+            serialize_response(field=field, response_content=content)
+        )
+        return JSONResponse(jsonable).body
+
+    order = make_order()
+    cached = _decode_entry(
+        str(order.id), _encode_entry(_to_cache_payload(str(order.id), order_to_dict(order), ttl_seconds=300))
+    )
+    orders = [make_order() for _ in range(LIST_SIZE)]
+
+    cases = [
+        (
+            "create",
+            lambda: fastapi_render(order_field, OrderResponse.model_validate(order, from_attributes=True)),
+            lambda: dump_order(order),
+        ),
+        (
+            "get (cache hit)",
+            lambda: fastapi_render(order_field, OrderResponse(**cached)),
+            lambda: dump_cached_order(cached),
+        ),
+        (
+            f"list ({LIST_SIZE} orders)",
+            lambda: fastapi_render(list_field, sorted(orders, key=lambda o: o.created_at, reverse=True)),
+            lambda: dump_order_page({"orders": orders, "size": len(orders), "next_cursor": None, "total": None}),
+        ),
+    ]
+
+    print(f"{'case':<20}{'before, us':>12}{'after, us':>12}{'speedup':>10}")
+    for name, before, after in cases:
+        before_us = cpu_per_call(before)
+        after_us = cpu_per_call(after)
+        print(f"{name:<20}{before_us:>12.1f}{after_us:>12.1f}{before_us / after_us:>9.1f}x")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
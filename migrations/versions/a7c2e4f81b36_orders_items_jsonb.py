@@ -0,0 +1,53 @@
+"""orders items jsonb
+
+Revision ID: a7c2e4f81b36
+Revises: f3a1c5d7e902
+Create Date: 2026-10-17 23:10:41.907215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e4f81b36'
+down_revision: Union[str, Sequence[str], None] = 'f3a1c5d7e902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Смена типа переписывает таблицу под ACCESS EXCLUSIVE — на большой таблице в окно обслуживания
+    op.alter_column(
+        'orders',
+        'items',
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_type=sa.JSON(),
+        existing_nullable=False,
+        postgresql_using='items::jsonb',
+    )
+    op.create_index(
+        'ix_orders_items',
+        'orders',
+        ['items'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'items': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_items', table_name='orders', postgresql_using='gin')
+    op.alter_column(
+        'orders',
+        'items',
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=False,
+        postgresql_using='items::json',
+    )
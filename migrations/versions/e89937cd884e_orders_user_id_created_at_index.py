@@ -0,0 +1,38 @@
+"""orders user_id created_at index
+
+Revision ID: e89937cd884e
+Revises: 0c62a7c039d2
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e89937cd884e'
+down_revision: Union[str, Sequence[str], None] = '0c62a7c039d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CONCURRENTLY не блокирует запись в orders на время построения,
+# но не работает внутри транзакции — отсюда autocommit_block
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_user_id_created_at',
+            'orders',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_user_id_created_at', table_name='orders', postgresql_concurrently=True)
@@ -0,0 +1,66 @@
+"""orders search indexes
+
+Revision ID: e99a13e2b584
+Revises: e89937cd884e
+Create Date: 2026-10-17 11:40:03.552871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e99a13e2b584'
+down_revision: Union[str, Sequence[str], None] = 'e89937cd884e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CONCURRENTLY не блокирует запись в orders на время построения,
+# но не работает внутри транзакции — отсюда autocommit_block
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_status_created_at',
+            'orders',
+            ['status', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_orders_created_at',
+            'orders',
+            [sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_orders_status_total_price',
+            'orders',
+            ['status', 'total_price'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_orders_pending_created_at',
+            'orders',
+            [sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text("status = 'PENDING'"),
+            postgresql_concurrently=True,
+        )
+        # Покрывается ведущей колонкой ix_orders_status_created_at
+        op.drop_index(op.f('ix_orders_status'), table_name='orders', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_orders_status'), 'orders', ['status'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_orders_pending_created_at', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_status_total_price', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_created_at', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_status_created_at', table_name='orders', postgresql_concurrently=True)
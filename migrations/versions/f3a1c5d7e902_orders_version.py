@@ -0,0 +1,32 @@
+"""orders version column
+
+Revision ID: f3a1c5d7e902
+Revises: e99a13e2b584
+Create Date: 2026-10-17 14:05:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a1c5d7e902'
+down_revision: Union[str, Sequence[str], None] = 'e99a13e2b584'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # server_default заполняет существующие строки без отдельного UPDATE
+    op.add_column(
+        'orders',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('orders', 'version')
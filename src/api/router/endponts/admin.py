@@ -0,0 +1,120 @@
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from redis.exceptions import RedisError
+from starlette import status
+
+from src.api.router.endponts.auth import get_current_admin_user
+from src.core.config import settings
+from src.core.rate_limit import limiter
+from src.core.security import password_hasher
+from src.db.redis.hot_orders import hot_orders, hot_orders_metrics
+from src.db.redis.order_loader import order_loader_metrics
+from src.db.redis.order_stats import bucket_starts, get_order_stats, get_user_order_stats
+from src.db.redis.redis_utils import order_cache_metrics
+from src.db.redis.session import CircuitOpenError, redis_metrics
+from src.db.redis.user_orders import user_orders_metrics
+from src.schemas.response.analytics import (
+    OrderStatsBucket,
+    OrderStatsResponse,
+    UserOrderStatsResponse,
+)
+
+
+# Лимит по умолчанию (settings.rate_limit_per_minute); после проверки прав — ключ по пользователю
+router_admin = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_current_admin_user), Depends(limiter.limit())],
+)
+
+# Ограничение на число бакетов в одном ответе
+MAX_BUCKETS = {"hour": 24 * 31, "day": 366}
+
+
+def _stats_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Order stats are temporarily unavailable",
+        headers={"Retry-After": str(int(settings.redis_breaker_open_seconds) or 1)},
+    )
+
+
+@router_admin.get("/metrics/password-hashing")
+async def password_hashing_metrics():
+    """Метрики пула хеширования паролей (текущий воркер)"""
+    return password_hasher.metrics()
+
+
+@router_admin.get("/metrics/order-cache")
+async def order_cache_metrics_endpoint():
+    """
+    Попадания/промахи/вытеснения кэша заказов: L1 (in-process) и L2 (Redis),
+    плюс склейка промахов, ранние обновления, read model списков пользователей
+    и состояние предохранителя Redis. Текущий воркер.
+    """
+    return {
+        **order_cache_metrics(),
+        "loader": order_loader_metrics(),
+        "user_lists": user_orders_metrics(),
+        "redis": redis_metrics(),
+    }
+
+
+@router_admin.get("/metrics/hot-orders")
+async def hot_orders_endpoint(limit: int = Query(20, ge=1, le=settings.order_hot_top_k)):
+    """
+    Самые читаемые заказы текущего воркера (top-K по count-min sketch):
+    оценка частоты, признак "горячий" (длинный TTL, закреплён в L1) и доля попаданий в кэш.
+    """
+    return {"orders": hot_orders(limit), **hot_orders_metrics()}
+
+
+@router_admin.get("/analytics/orders", response_model=OrderStatsResponse)
+async def order_analytics(
+    start: datetime,
+    end: datetime,
+    granularity: Literal["hour", "day"] = "day",
+):
+    """
+    Количество и выручка заказов по статусам за каждый час/день периода [start, end).
+    Читается из роллапов, которые поддерживаются при создании и смене статуса заказов.
+    """
+    starts = bucket_starts(granularity, start, end)
+    if len(starts) > MAX_BUCKETS[granularity]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many {granularity} buckets, max {MAX_BUCKETS[granularity]}"
+        )
+
+    try:
+        buckets, dropped_updates = await get_order_stats(granularity, starts)
+    except (CircuitOpenError, RedisError):
+        raise _stats_unavailable()
+    return OrderStatsResponse(
+        granularity=granularity,
+        buckets=[
+            OrderStatsBucket(bucket=moment, statuses=stats)
+            for moment, stats in buckets
+        ],
+        stale=dropped_updates > 0,
+        dropped_updates=dropped_updates,
+    )
+
+
+@router_admin.get("/analytics/users/{user_id}", response_model=UserOrderStatsResponse)
+async def user_order_analytics(user_id: int):
+    """Итоги по заказам пользователя в разрезе статусов"""
+    try:
+        stats, dropped_updates = await get_user_order_stats(user_id)
+    except (CircuitOpenError, RedisError):
+        raise _stats_unavailable()
+    return UserOrderStatsResponse(
+        user_id=user_id,
+        statuses=stats,
+        total_count=sum(entry["count"] for entry in stats.values()),
+        total_revenue=round(sum(entry["revenue"] for entry in stats.values()), 2),
+        stale=dropped_updates > 0,
+        dropped_updates=dropped_updates,
+    )
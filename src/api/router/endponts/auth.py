@@ -3,19 +3,19 @@ from datetime import datetime
 from fastapi import Depends, HTTPException, status, APIRouter, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import ValidationError
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.rate_limit import limiter
 from src.core.security import (
-    get_password_hash,
-    verify_password,
+    password_hasher,
+    PasswordHasherBusy,
     create_access_token,
     decode_token,
 )
 from src.db.session import get_db
 from src.db.dao.users_dao import UserDAO
 from src.db.models.user import User
+from src.db.redis.user_cache import get_cached_user, cache_user
 from src.schemas.request.user import UserCreateRequest
 from src.schemas.response.user import UserResponse, TokenResponse
 
@@ -23,11 +23,11 @@ router_auth = APIRouter(tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"api/v1/auth/token")
 
-limiter = Limiter(key_func=get_remote_address)
-
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
     """Получение текущего пользователя из JWT токена"""
 
@@ -56,14 +56,22 @@ async def get_current_user(
             detail="Token has expired",
         )
 
-    # Ищем пользователя
-    user_dao = UserDAO(User, db)
-    user = await user_dao.get_by_email(email)
+    # Ищем пользователя: сначала в кэше принципалов, затем в БД
+    user = await get_cached_user(email)
 
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-        )
+    if user is None:
+        user_dao = UserDAO(User, db)
+        user = await user_dao.get_by_email(email)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
+        await cache_user(user)
+
+    # Лимитер ключует запросы по пользователю, а не по IP
+    request.state.user_id = user.id
 
     # Проверяем активен ли пользователь
     if not user.is_active:
@@ -85,8 +93,30 @@ async def get_current_active_user(
     return current_user
 
 
-@router_auth.post("/register", response_model=UserResponse)
-@limiter.limit("6/minute")
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    """Получение текущего пользователя с правами администратора"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+    return current_user
+
+
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Service is busy, try again later",
+        headers={"Retry-After": "1"},
+    )
+
+
+@router_auth.post(
+    "/register",
+    response_model=UserResponse,
+    dependencies=[Depends(limiter.limit("6/minute"))],
+)
 async def register(
     request: Request,
     user_data: UserCreateRequest,
@@ -105,7 +135,7 @@ async def register(
             )
 
         # 2. Хеширование пароля
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
 
         # 3. Подготовка данных для создания
         user_dict = {
@@ -141,6 +171,9 @@ async def register(
         # Пробрасываем HTTP-исключения (например 400 от проверки)
         raise
 
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -148,8 +181,11 @@ async def register(
         )
 
 
-@router_auth.post("/token", response_model=TokenResponse)
-@limiter.limit("6/minute")
+@router_auth.post(
+    "/token",
+    response_model=TokenResponse,
+    dependencies=[Depends(limiter.limit("6/minute"))],
+)
 async def login_for_token(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -160,7 +196,14 @@ async def login_for_token(
 
     # username в OAuth2 = email
     user = await user_dao.get_by_email(form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        password_ok = bool(user) and await password_hasher.verify(
+            form_data.password, user.hashed_password
+        )
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
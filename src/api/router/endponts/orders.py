@@ -1,42 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from src.api.router.endponts.auth import get_current_active_user
-from src.core.kafka import publish_new_order
-from src.db.dao.orders_dao import OrderDAO
-from src.db.models.order import Order
+from src.api.router.endponts.auth import get_current_active_user, get_current_admin_user
+from src.core.config import settings
+from src.core.etag import order_etag, orders_list_etag, etag_matches, if_match_version
+from src.core.kafka import publish_new_order, publish_new_orders
+from src.core.rate_limit import limiter
+from src.db.dao.orders_dao import OrderDAO, ORDER_VERSION_COLUMNS
+from src.db.models.order import Order, OrderStatus as DBOrderStatus, ORDER_STATUS_TRANSITIONS
 from src.db.models.user import User
-from src.db.redis.redis_utils import get_cached_order, cache_order, invalidate_order_cache
+from src.db.redis.redis_utils import (
+    get_cached_order_etag,
+    ORDER_NOT_FOUND,
+    get_cached_orders,
+    cache_order,
+    cache_orders,
+    cache_orders_not_found,
+    order_to_dict,
+    get_user_orders_count,
+    init_user_orders_count,
+    incr_user_orders_count,
+)
+from src.db.redis.order_loader import add_orders_to_bloom, get_order, record_read
+from src.db.redis.idempotency import (
+    IdempotentRequest,
+    IdempotencyKeyReused,
+    IdempotencyInProgress,
+    request_fingerprint,
+)
+from src.db.redis.order_stats import record_orders_created, record_status_changes
 from src.db.redis.session import get_redis
-from src.db.session import get_db
-from src.schemas.request.order import OrderCreateRequest, OrderStatusUpdate
-from src.schemas.response.order import OrderResponse
+from src.db.redis.user_orders import add_user_orders, read_user_orders_page
+from src.db.session import get_db, async_session, reads_from_primary, replica_engine, session_factory_for
+from src.schemas.base import OrderStatus
+from src.schemas.request.order import (
+    OrderCreateRequest,
+    OrderStatusUpdate,
+    OrderBatchCreateRequest,
+    OrderBulkStatusUpdate,
+)
+from src.schemas.response.order import (
+    OrderResponse,
+    OrderBatchItemResult,
+    OrderBatchCreateResponse,
+    OrderListResponse,
+    OrderBulkStatusUpdateResponse,
+    OrderMultiGetResponse,
+)
+from src.schemas.serializers import (
+    JSONBytesResponse,
+    dump_order,
+    dump_order_page,
+    dump_cached_order,
+    dump_cached_order_page,
+)
 from uuid import UUID
 from fastapi import Request
 
 
-limiter = Limiter(key_func=get_remote_address)
-
-
 router_order = APIRouter(
     prefix="/orders", tags=["orders"], dependencies=[Depends(get_current_active_user)]
 )
 
 
-@router_order.post("/", response_model=OrderResponse)
-@limiter.limit("10/minute")
-async def create_order_endpoint(
-    request: Request,
-    order_request: OrderCreateRequest,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """"Эндпоинт для создания заказа"""
-    order_dao = OrderDAO(Order, db)
+def _not_modified(etag: str, response: Response) -> Response:
+    not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    not_modified.headers.raw.extend(response.headers.raw)
+    return not_modified
+
+
+def _json_response(content: bytes, response: Response) -> JSONBytesResponse:
+    """
+    Готовые JSON-байты в обход response_model: FastAPI не будет их перевалидировать.
+    Заголовки, выставленные зависимостями (лимитер, ETag), переносим вручную.
+    """
+    json_response = JSONBytesResponse(content)
+    json_response.headers.raw.extend(response.headers.raw)
+    return json_response
 
+
+def _build_order_dict(order_request: OrderCreateRequest) -> dict:
+    """Готовит данные заказа для вставки: total_price считается на сервере"""
     total_price = 0.0
     for item in order_request.items:
         total_price += item.quantity * item.price
@@ -44,128 +97,615 @@ async def create_order_endpoint(
     order_data = order_request.model_dump(exclude_unset=True)
     order_data["items"] = [item.model_dump() for item in order_request.items]
 
-    order_dict = {
+    return {
         "items": order_data["items"],
         "total_price": total_price,  # ← перезаписываем!
-        "status": order_data["status"] or "PENDING",
+        "status": order_data.get("status") or "PENDING",
     }
 
-    order = await order_dao.create(
-        order_dict,
-        user_id = current_user.id,
-    )
+
+@router_order.post(
+    "/",
+    response_model=OrderResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))],
+)
+async def create_order_endpoint(
+    request: Request,
+    response: Response,
+    order_request: OrderCreateRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """"Эндпоинт для создания заказа (поддерживает заголовок Idempotency-Key)"""
+    idempotent = None
+    if idempotency_key:
+        idempotent = IdempotentRequest(
+            scope=f"orders:create:{current_user.id}",
+            key=idempotency_key,
+            fingerprint=request_fingerprint(order_request.model_dump_json()),
+        )
+        try:
+            replay = await idempotent.begin()
+        except IdempotencyKeyReused:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request body"
+            )
+        except IdempotencyInProgress:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+
+        if replay is not None:
+            replay_status, replay_body = replay
+            if not idempotent.published:
+                # Первый запрос создал заказ, но не опубликовал событие — публикуем за него
+                await publish_new_order(json.loads(replay_body)["id"], current_user.id)
+                await idempotent.mark_published()
+            response.headers["Idempotent-Replayed"] = "true"
+            replayed = _json_response(replay_body, response)
+            replayed.status_code = replay_status
+            return replayed
+
+    order_dao = OrderDAO(Order, db)
+
+    order_dict = _build_order_dict(order_request)
+
+    try:
+        order = await order_dao.create(
+            order_dict,
+            user_id = current_user.id,
+        )
+    except Exception:
+        if idempotent:
+            await idempotent.release()
+        raise
+
+    body = dump_order(order)
+    # Ответ сохраняем сразу после коммита: повтор не должен создать второй заказ,
+    # даже если дальше упадёт публикация в Kafka — тогда событие опубликует повтор
+    if idempotent:
+        await idempotent.complete(status.HTTP_200_OK, body, published=False)
+
+    # Write-through: первый GET нового заказа — уже попадание
+    await cache_order(order.id, order_to_dict(order))
+    await add_orders_to_bloom([order.id])
+    await incr_user_orders_count(current_user.id)
+    await add_user_orders(current_user.id, [(order.id, order.created_at)])
+    await record_orders_created([order])
     await publish_new_order(str(order.id), current_user.id)
-    return OrderResponse.from_orm(order)
+    if idempotent:
+        await idempotent.mark_published()
+    return _json_response(body, response)
 
 
-@router_order.get("/{order_id}/", response_model=OrderResponse)
-@limiter.limit("10/minute")
-async def get_order_endpoint(
+@router_order.post(
+    "/batch",
+    response_model=OrderBatchCreateResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))],
+)
+async def create_orders_batch_endpoint(
     request: Request,
-    order_id: UUID,
+    batch_request: OrderBatchCreateRequest,
     db: AsyncSession = Depends(get_db),
-    redis=Depends(get_redis),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Пакетное создание заказов: один multi-row INSERT и одна пачка событий в Kafka.
+    Невалидные элементы не прерывают пакет — для каждого возвращается свой результат.
+    """
+    if len(batch_request.orders) > settings.order_batch_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size exceeds {settings.order_batch_max_size} orders"
+        )
+
+    results: list[OrderBatchItemResult | None] = [None] * len(batch_request.orders)
+    valid: list[tuple[int, dict]] = []
+
+    for index, raw_order in enumerate(batch_request.orders):
+        try:
+            order_request = OrderCreateRequest.model_validate(raw_order)
+        except ValidationError as ve:
+            error = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                for err in ve.errors()
+            )
+            results[index] = OrderBatchItemResult(index=index, success=False, error=error)
+        else:
+            valid.append((index, _build_order_dict(order_request)))
+
+    if valid:
+        order_dao = OrderDAO(Order, db)
+        orders = await order_dao.create_many(
+            [order_dict for _, order_dict in valid],
+            user_id=current_user.id,
+        )
+        await cache_orders(order_to_dict(order) for order in orders)
+        await add_orders_to_bloom(order.id for order in orders)
+        await incr_user_orders_count(current_user.id, len(orders))
+        await add_user_orders(current_user.id, ((order.id, order.created_at) for order in orders))
+        await record_orders_created(orders)
+        await publish_new_orders([(str(order.id), current_user.id) for order in orders])
+
+        for (index, _), order in zip(valid, orders):
+            results[index] = OrderBatchItemResult(
+                index=index,
+                success=True,
+                order=OrderResponse.model_validate(order),
+            )
+
+    return OrderBatchCreateResponse(
+        results=results,
+        created=len(valid),
+        failed=len(results) - len(valid),
+    )
+
+
+@router_order.get(
+    "/",
+    response_model=OrderMultiGetResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))],
+)
+async def get_orders_by_ids(
+    request: Request,
+    ids: list[UUID] = Query(..., description="Id заказов (?ids=...&ids=...)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Получение нескольких заказов за один запрос: один pipeline в Redis,
+    промахи догружаются одним запросом в БД и сразу кладутся в кэш.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.order_multi_get_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many ids, max {settings.order_multi_get_max_size}"
+        )
+
+    # 1. Все ключи одним pipeline
+    cached = await get_cached_orders(ids)
+
+    # 2. Промахи — одним WHERE id IN (...)
+    miss_ids = [order_id for order_id in ids if cached[str(order_id)] is None]
+    loaded = {}
+    if miss_ids:
+        order_dao = OrderDAO(Order, db)
+        loaded = {
+            str(db_order.id): order_to_dict(db_order)
+            for db_order in await order_dao.get_many(miss_ids)
+        }
+        not_found = [order_id for order_id in miss_ids if str(order_id) not in loaded]
+        if not_found and replica_engine is not None:
+            # Реплика могла ещё не получить новые заказы — в negative cache только по primary
+            async with async_session() as session:
+                for db_order in await OrderDAO(Order, session).get_many(not_found):
+                    loaded[str(db_order.id)] = order_to_dict(db_order)
+        # 3. Догружаем кэш одним pipeline, несуществующие — в negative cache
+        await cache_orders(loaded.values())
+        await cache_orders_not_found(
+            order_id for order_id in miss_ids if str(order_id) not in loaded
+        )
+
+    orders = []
+    missing = []
+    for order_id in ids:
+        order_data = cached[str(order_id)] or loaded.get(str(order_id))
+        if order_data is None or order_data is ORDER_NOT_FOUND:
+            missing.append(order_id)
+        else:
+            orders.append(OrderResponse(**order_data))
+
+    return OrderMultiGetResponse(orders=orders, missing=missing)
+
+
+EXPORT_CSV_COLUMNS = [
+    "id", "user_id", "status", "total_price", "items_count", "created_at", "updated_at", "items",
+]
+EXPORT_CHUNK_ROWS = 200
+
+
+async def _export_orders(
+    export_format: str,
+    user_id: Optional[int],
+    order_status: Optional[DBOrderStatus],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+) -> AsyncIterator[str]:
+    """
+    Генератор выгрузки. Сессия открывается внутри, чтобы жить ровно столько,
+    сколько идёт стрим, а строки приходят серверным курсором пачками.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(EXPORT_CSV_COLUMNS)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    async with async_session() as session:
+        order_dao = OrderDAO(Order, session)
+        rows = 0
+        async for order in order_dao.stream_orders(
+            user_id=user_id,
+            status=order_status,
+            created_from=created_from,
+            created_to=created_to,
+        ):
+            if export_format == "csv":
+                writer.writerow([
+                    order.id,
+                    order.user_id,
+                    order.status.value,
+                    order.total_price,
+                    order.items_count,
+                    order.created_at.isoformat(),
+                    order.updated_at.isoformat(),
+                    json.dumps(order.items, ensure_ascii=False),
+                ])
+            else:
+                buffer.write(OrderResponse.model_validate(order).model_dump_json())
+                buffer.write("\n")
+
+            rows += 1
+            if rows % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+@router_order.get(
+    "/export/",
+    dependencies=[Depends(limiter.limit("10/minute")), Depends(get_current_admin_user)],
+)
+async def export_orders(
+    request: Request,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    user_id: Optional[int] = None,
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    """
+    Потоковая выгрузка заказов в NDJSON или CSV с фильтрами по пользователю,
+    статусу и периоду создания (только админ). Память не растёт с размером выборки.
+    """
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"orders.{'csv' if export_format == 'csv' else 'ndjson'}"
+
+    return StreamingResponse(
+        _export_orders(
+            export_format,
+            user_id=user_id,
+            order_status=DBOrderStatus(order_status.value) if order_status else None,
+            created_from=created_from,
+            created_to=created_to,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router_order.get(
+    "/search/",
+    response_model=OrderListResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))],
+)
+async def search_orders(
+    request: Request,
+    response: Response,
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    min_total: Optional[float] = Query(None, ge=0),
+    max_total: Optional[float] = Query(None, ge=0),
+    limit: int = Query(20, ge=1),
+    cursor: Optional[str] = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
 ):
-    """"Получение заказа по его id"""
-    # 1. Пробуем взять из кэша
-    cached = await get_cached_order(order_id)
+    """
+    Поиск заказов по статусу, пользователю, периоду создания и сумме.
+    Результат — страница от новых к старым; размер страницы ограничен сверху.
+    Не админ ищет только среди своих заказов (user_id игнорируется).
+    """
+    if not current_user.is_admin:
+        user_id = current_user.id
+    limit = min(limit, settings.order_search_max_page_size)
+    order_dao = OrderDAO(Order, db)
 
-    if cached:
-        return OrderResponse(**cached)
+    try:
+        orders, next_cursor = await order_dao.search(
+            limit=limit,
+            cursor=cursor,
+            status=DBOrderStatus(order_status.value) if order_status else None,
+            user_id=user_id,
+            created_from=created_from,
+            created_to=created_to,
+            min_total=min_total,
+            max_total=max_total,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    return _json_response(dump_order_page({
+        "orders": orders,
+        "size": len(orders),
+        "next_cursor": next_cursor,
+        "total": None,
+    }), response)
 
-    # 2. Нет в кэше → идём в базу
+
+@router_order.get(
+    "/by-product/{product_id}/",
+    response_model=OrderListResponse,
+    dependencies=[Depends(limiter.limit("10/minute")), Depends(get_current_admin_user)],
+)
+async def get_orders_by_product(
+    request: Request,
+    response: Response,
+    product_id: str,
+    limit: int = Query(20, ge=1),
+    cursor: Optional[str] = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Заказы, содержащие товар product_id (отзыв товара, обращения в поддержку; только админ),
+    от новых к старым. Поиск по GIN-индексу на items, без полного сканирования.
+    """
+    limit = min(limit, settings.order_search_max_page_size)
     order_dao = OrderDAO(Order, db)
-    db_order = await order_dao.get(id=order_id)
 
-    if not db_order:
-        raise HTTPException(status_code=404, detail="Order not found")
+    try:
+        orders, next_cursor = await order_dao.get_by_product(
+            product_id=product_id,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    return _json_response(dump_order_page({
+        "orders": orders,
+        "size": len(orders),
+        "next_cursor": next_cursor,
+        "total": None,
+    }), response)
 
-    # 3. Готовим данные для кэширования (убираем служебные поля sqlalchemy)
-    order_dict = db_order.__dict__.copy()
-    order_dict.pop("_sa_instance_state", None)  # важно!
 
-    # Добавляем поля, которых может не быть в __dict__
-    order_dict.setdefault("user_id", db_order.user_id)
-    order_dict.setdefault("items", db_order.items)
-    order_dict.setdefault("total_price", db_order.total_price)
-    order_dict.setdefault("status", db_order.status)
-    order_dict.setdefault("created_at", db_order.created_at)
+@router_order.get(
+    "/{order_id}/",
+    response_model=OrderResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))],
+)
+async def get_order_endpoint(
+    request: Request,
+    response: Response,
+    order_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    redis=Depends(get_redis),
+):
+    """"Получение заказа по его id (поддерживает If-None-Match → 304)"""
+    # 0. Условный запрос: сверяем ETag по кэшу, не трогая ни БД, ни сериализацию
+    if if_none_match:
+        cached_etag = await get_cached_order_etag(order_id)
+        if cached_etag and etag_matches(if_none_match, cached_etag):
+            # Опрос по ETag — тоже чтение: иначе самые частые заказы не наберут частоту
+            record_read(str(order_id), hit=True)
+            return _not_modified(cached_etag, response)
+
+    # 1. Кэш, при промахе — БД: одновременные промахи склеиваются в одну загрузку.
+    # Пользователь, который недавно писал, при промахе читает с primary
+    cached = await get_order(order_id, primary=lambda: reads_from_primary(request))
+
+    if not cached:
+        raise HTTPException(status_code=404, detail="Order not found")
 
-    # 4. Кэшируем через hash
-    await cache_order(order_id, order_dict, ttl_seconds=300)
+    if etag_matches(if_none_match, cached["etag"]):
+        return _not_modified(cached["etag"], response)
 
-    # 5. Возвращаем из базы
-    return db_order
+    response.headers["ETag"] = cached["etag"]
+    return _json_response(dump_cached_order(cached), response)
 
 
-@router_order.patch("/{order_id}/", response_model=OrderResponse)
-@limiter.limit("10/minute")
+@router_order.patch(
+    "/{order_id}/",
+    response_model=OrderResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))],
+)
 async def update_order_status(
     request: Request,
+    response: Response,
     order_id: UUID,
     update_data: OrderStatusUpdate,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     redis=Depends(get_redis),
 ):
     """
     Обновление статуса заказа (только авторизованные пользователи).
-    После обновления инвалидируется кэш.
+    Переходы: pending → paid → shipped, pending/paid → canceled.
+    С If-Match статус меняется, только если заказ не изменился с момента чтения (иначе 412).
+    После обновления новая версия сразу записывается в кэш.
     """
-    order_dao = OrderDAO(Order, db)
-
-    # Получаем заказ из БД
-    db_order = await order_dao.get(id=order_id)
-    if not db_order:
+    try:
+        expected_version = if_match_version(if_match) if if_match else None
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Заказ не найден"
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match does not match current order version"
         )
 
-    # Проверяем допустимый статус (если не используешь Enum в модели)
-    allowed_statuses = {"pending", "paid", "shipped", "canceled"}
-    if update_data.status not in allowed_statuses:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid status: {', '.join(allowed_statuses)}"
-        )
+    order_dao = OrderDAO(Order, db)
+    target_status = DBOrderStatus(update_data.status.value)
 
-    # Обновляем в базе
-    updated_order = await order_dao.update(
-        id=order_id,
-        obj_in={"status": update_data.status}
+    # Один UPDATE ... RETURNING: проверка перехода и версии — в WHERE
+    transitioned = await order_dao.transition_status(
+        id=order_id, status=target_status, expected_version=expected_version
     )
 
-    if not updated_order:
+    if transitioned is None:
+        # Неудачный путь: разбираемся, почему условие не выполнилось
+        state = await order_dao.get_state(order_id)
+        if state is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Заказ не найден"
+            )
+        current_status, current_version = state
+        if expected_version is not None and current_version != expected_version:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="If-Match does not match current order version",
+                headers={"ETag": order_etag(current_version)},
+            )
+        if target_status in ORDER_STATUS_TRANSITIONS[current_status]:
+            # Переход разрешён, но строку успели изменить между снимком и UPDATE
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Order was modified concurrently, retry"
+            )
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error while updating status"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot change status from {current_status.value} to {target_status.value}"
         )
 
-    # Инвалидируем кэш
-    await invalidate_order_cache(order_id)
+    updated_order, previous_status = transitioned
 
+    # Write-through свежей строкой из RETURNING (L1 других воркеров — через pub/sub)
+    await cache_order(order_id, order_to_dict(updated_order), notify=True)
+    await record_status_changes([transitioned])
+
+    response.headers["ETag"] = order_etag(updated_order.version)
     return updated_order
 
 
-@router_order.get("/user/{user_id}/", response_model=list[OrderResponse])
-@limiter.limit("10/minute")
+@router_order.patch(
+    "/bulk/status/",
+    response_model=OrderBulkStatusUpdateResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))],
+)
+async def bulk_update_order_status(
+    request: Request,
+    update_data: OrderBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Массовое обновление статуса: один UPDATE по всем id и одна запись в кэш (pipeline).
+    Заказы, которым переход в новый статус не разрешён, возвращаются в rejected.
+    """
+    if len(update_data.order_ids) > settings.order_bulk_update_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many orders, max {settings.order_bulk_update_max_size}"
+        )
+
+    order_dao = OrderDAO(Order, db)
+    updated, missing, rejected = await order_dao.bulk_update_status(
+        ids=update_data.order_ids,
+        status=DBOrderStatus(update_data.status.value),
+    )
+
+    await cache_orders((order_to_dict(order) for order, _ in updated), notify=True)
+    await record_status_changes(updated)
+
+    return OrderBulkStatusUpdateResponse(
+        updated=[order for order, _ in updated],
+        missing=missing,
+        rejected=rejected,
+    )
+
+
+@router_order.get(
+    "/user/{user_id}/",
+    response_model=OrderListResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))],
+)
 async def get_user_orders(
     request: Request,
+    response: Response,
     user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    include_total: bool = Query(False, description="Вернуть общее число заказов пользователя"),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Получение списка заказов конкретного пользователя.
+    Получение заказов конкретного пользователя постранично, от новых к старым.
     Рекомендуется проверять, что запрашивает свои заказы или админ.
+    Читается из read model в Redis (список id + кэш заказов); БД — если Redis недоступен.
     """
+    try:
+        page = await read_user_orders_page(user_id, limit, cursor, session_factory_for(db))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    if page is not None:
+        orders, next_cursor, total = page
+        total = total if include_total else None
+        etag = orders_list_etag(
+            ((order["id"], order["updated_at"]) for order in orders), next_cursor, total
+        )
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag, response)
+        response.headers["ETag"] = etag
+        return _json_response(dump_cached_order_page(orders, next_cursor, total), response)
 
     order_dao = OrderDAO(Order, db)
 
-    orders = await order_dao.get_user_orders(user_id=user_id)
-
-    if not orders:
-        return []
+    total = None
+    if include_total:
+        # Счётчик в Redis поддерживается при создании заказов; COUNT(*) — только при холодном старте
+        total = await get_user_orders_count(user_id)
+        if total is None:
+            total = await order_dao.count_user_orders(user_id)
+            await init_user_orders_count(user_id, total)
+
+    try:
+        if if_none_match:
+            # Условный запрос: сначала только id/created_at/updated_at — items читаем, лишь если страница изменилась
+            versions, next_cursor = await order_dao.get_user_orders_page(
+                user_id=user_id, limit=limit, cursor=cursor, options=ORDER_VERSION_COLUMNS
+            )
+            etag = orders_list_etag(
+                ((order.id, order.updated_at) for order in versions), next_cursor, total
+            )
+            if etag_matches(if_none_match, etag):
+                return _not_modified(etag, response)
+
+        orders, next_cursor = await order_dao.get_user_orders_page(
+            user_id=user_id, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
-    orders_sorted = sorted(orders, key=lambda o: o.created_at, reverse=True)
+    etag = orders_list_etag(
+        ((order.id, order.updated_at) for order in orders), next_cursor, total
+    )
 
-    return orders_sorted
\ No newline at end of file
+    response.headers["ETag"] = etag
+    return _json_response(dump_order_page({
+        "orders": orders,
+        "size": len(orders),
+        "next_cursor": next_cursor,
+        "total": total,
+    }), response)
@@ -0,0 +1,56 @@
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import select
+
+from src.core.config import settings
+from src.db.models.order import Order
+from src.db.models.user import User  # noqa: F401 — нужен мапперу для Order.user
+from src.db.redis.bloom import order_bloom
+from src.db.session import async_session
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+
+
+async def rebuild_order_bloom(reset: bool = False):
+    """
+    Заполняет Bloom-фильтр id всех заказов и помечает его готовым.
+    Приложение (при ORDER_BLOOM_ENABLED) само добавляет новые заказы, поэтому
+    заказы, созданные во время загрузки, не теряются. --reset — начать с пустого
+    фильтра (например, после смены ёмкости); до конца загрузки фильтр не используется.
+    Ошибка записи в Redis прерывает загрузку: частично заполненный фильтр не помечается готовым.
+    """
+    if not settings.order_bloom_enabled:
+        log.warning("ORDER_BLOOM_ENABLED is off: the app neither adds to nor checks the filter")
+
+    if reset:
+        await order_bloom.reset()
+        log.info("Bloom filter reset")
+
+    async with async_session() as session:
+        result = await session.stream_scalars(
+            select(Order.id).execution_options(yield_per=CHUNK_SIZE)
+        )
+        chunk, total = [], 0
+        async for order_id in result:
+            chunk.append(order_id)
+            if len(chunk) >= CHUNK_SIZE:
+                await order_bloom.add(chunk)
+                total += len(chunk)
+                chunk = []
+        await order_bloom.add(chunk)
+        total += len(chunk)
+
+    await order_bloom.mark_ready()
+    log.info(f"Bloom filter ready: {total} orders, {order_bloom.size} bits, {order_bloom.hashes} hashes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересборка Bloom-фильтра заказов")
+    parser.add_argument("--reset", action="store_true", help="начать с пустого фильтра")
+    args = parser.parse_args()
+    asyncio.run(rebuild_order_bloom(reset=args.reset))
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+
+from sqlalchemy import BigInteger, cast, func, select
+
+from src.db.models.order import Order
+from src.db.models.user import User  # noqa: F401 — нужен мапперу для Order.user
+from src.db.redis.order_stats import bucket_key, user_key, clear_order_stats, write_stats
+from src.db.session import async_session
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+def _revenue_cents():
+    # Округляем каждую строку так же, как to_cents при инкрементальном обновлении
+    return func.sum(cast(func.round(Order.total_price * 100), BigInteger))
+
+
+async def _copy(result, to_row, chunk_size: int = 1000) -> int:
+    """Переливает агрегаты из серверного курсора в Redis пачками"""
+    rows, total = [], 0
+    async for row in result:
+        rows.append(to_row(*row))
+        if len(rows) >= chunk_size:
+            await write_stats(rows)
+            total += len(rows)
+            rows = []
+    await write_stats(rows)
+    return total + len(rows)
+
+
+async def rebuild_order_stats():
+    """
+    Пересобирает роллапы заказов с нуля агрегатами по всей таблице.
+    Запускать в спокойное время: изменения заказов во время пересборки могут не попасть в итог.
+    """
+    async with async_session() as session:
+        deleted = await clear_order_stats()
+        log.info(f"Removed {deleted} stats keys")
+
+        for granularity in ("hour", "day"):
+            bucket = func.date_trunc(granularity, func.timezone("UTC", Order.created_at))
+            result = await session.stream(
+                select(bucket, Order.status, func.count(), _revenue_cents())
+                .group_by(bucket, Order.status)
+            )
+            total = await _copy(
+                result,
+                lambda moment, status, count, revenue, granularity=granularity: (
+                    bucket_key(granularity, moment), status.value, count, revenue or 0
+                ),
+            )
+            log.info(f"Rebuilt {total} {granularity} stats rows")
+
+        result = await session.stream(
+            select(Order.user_id, Order.status, func.count(), _revenue_cents())
+            .group_by(Order.user_id, Order.status)
+        )
+        total = await _copy(
+            result,
+            lambda user_id, status, count, revenue: (
+                user_key(user_id), status.value, count, revenue or 0
+            ),
+        )
+        log.info(f"Rebuilt {total} user stats rows")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_order_stats())
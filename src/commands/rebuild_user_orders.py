@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from src.core.config import settings
+from src.db.models.order import Order
+from src.db.models.user import User  # noqa: F401 — нужен мапперу для Order.user
+from src.db.redis.user_orders import clear_user_orders, mark_user_orders_ready, store_user_orders
+from src.db.session import async_session
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+
+
+async def rebuild_user_orders(reset: bool = False):
+    """
+    Заполняет read model списков заказов (ZSET на пользователя) из БД и помечает
+    списки готовыми — только после загрузки всех заказов. Приложение само добавляет
+    новые заказы, поэтому созданные во время загрузки не теряются.
+    --reset — сначала удалить все списки; пока команда работает, списки читаются
+    из БД и лениво пересобираются по запросам.
+    """
+    if not settings.user_orders_read_model_enabled:
+        log.warning("USER_ORDERS_READ_MODEL_ENABLED is off: the app neither updates nor reads the lists")
+
+    if reset:
+        deleted = await clear_user_orders()
+        log.info(f"Removed {deleted} user order lists")
+
+    user_ids = set()
+    total = 0
+    async with async_session() as session:
+        result = await session.stream(
+            select(Order.user_id, Order.id, Order.created_at).execution_options(yield_per=CHUNK_SIZE)
+        )
+        async for rows in result.partitions():
+            chunk = defaultdict(list)
+            for user_id, order_id, created_at in rows:
+                chunk[user_id].append((order_id, created_at))
+            await store_user_orders(chunk, mark_ready=False)
+            user_ids.update(chunk)
+            total += len(rows)
+
+    users = list(user_ids)
+    for start in range(0, len(users), CHUNK_SIZE):
+        await mark_user_orders_ready(users[start:start + CHUNK_SIZE])
+    log.info(f"User order lists ready: {len(users)} users, {total} orders")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересборка списков заказов пользователей в Redis")
+    parser.add_argument("--reset", action="store_true", help="удалить все списки перед загрузкой")
+    args = parser.parse_args()
+    asyncio.run(rebuild_user_orders(reset=args.reset))
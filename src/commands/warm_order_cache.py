@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import logging
+from typing import List
+from uuid import UUID
+
+from src.core.config import settings
+from src.db.dao.orders_dao import OrderDAO
+from src.db.models.order import Order
+from src.db.redis.order_loader import get_recent_reads
+from src.db.redis.redis_utils import cache_orders, order_to_dict
+from src.db.session import async_session
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+
+
+async def _warm(orders: List[Order]) -> int:
+    for start in range(0, len(orders), CHUNK_SIZE):
+        await cache_orders(order_to_dict(order) for order in orders[start:start + CHUNK_SIZE])
+    return len(orders)
+
+
+async def warm_order_cache(recent_read: int, recent_created: int):
+    """
+    Прогрев кэша заказов после деплоя или сброса Redis: недавно прочитанные
+    (по ZSET, который ведут воркеры) и последние созданные заказы.
+    Запись условная — более новые версии, уже попавшие в кэш, не перетираются.
+    """
+    async with async_session() as session:
+        order_dao = OrderDAO(Order, session)
+
+        if recent_read:
+            ids = [UUID(order_id) for order_id in await get_recent_reads(recent_read)]
+            warmed = 0
+            for start in range(0, len(ids), CHUNK_SIZE):
+                orders = await order_dao.get_many(
+                    ids[start:start + CHUNK_SIZE]
+                )
+                warmed += await _warm(orders)
+            log.info(f"Warmed {warmed} recently read orders")
+
+        if recent_created:
+            orders = await order_dao.get_recent(recent_created)
+            log.info(f"Warmed {await _warm(orders)} recently created orders")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Прогрев кэша заказов")
+    parser.add_argument("--recent-read", type=int, default=settings.order_cache_recent_reads_max)
+    parser.add_argument("--recent-created", type=int, default=settings.order_cache_warm_recent_created)
+    args = parser.parse_args()
+    asyncio.run(warm_order_cache(args.recent_read, args.recent_created))
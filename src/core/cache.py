@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Ограниченный по размеру in-process LRU-кэш с TTL на каждую запись.
+    Закреплённые (pinned) записи не вытесняются по размеру, но истекают по TTL.
+    Не потокобезопасен — рассчитан на использование внутри одного event loop.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self._pinned: set = set()
+
+        # Счётчики
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0      # вытеснено по размеру (LRU)
+        self.expirations = 0    # выброшено по TTL
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._pinned.discard(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self, key: Hashable, value: V, ttl_seconds: Optional[float] = None, pinned: bool = False
+    ) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        now = time.monotonic()
+        self._data[key] = (now + ttl, value)
+        self._data.move_to_end(key)
+        if pinned:
+            self._pinned.add(key)
+        else:
+            self._pinned.discard(key)
+
+        # Вытесняем самые давно использованные записи
+        while len(self._data) > self.max_size:
+            old_key, entry = self._data.popitem(last=False)
+            if old_key in self._pinned and entry[0] > now and len(self._pinned) < self.max_size:
+                # Живую закреплённую запись возвращаем в конец очереди
+                self._data[old_key] = entry
+                continue
+            self._pinned.discard(old_key)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        self._pinned.discard(key)
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._pinned.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "pinned": len(self._pinned),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
@@ -0,0 +1,120 @@
+import time
+from typing import Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонён без обращения к зависимости: предохранитель разомкнут"""
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для внешней зависимости (Redis и т.п.).
+    closed — вызовы идут как обычно; failure_threshold ошибок подряд размыкают цепь.
+    open — вызовы сразу отклоняются CircuitOpenError, без сетевых таймаутов.
+    half_open — через open_seconds пропускаем до half_open_max_calls пробных вызовов:
+    успех замыкает цепь, ошибка снова размыкает.
+    Ошибкой считаются только исключения из failure_exceptions — например,
+    ответ Redis с ошибкой команды говорит о том, что сервер жив.
+    Работает в пределах одного event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        open_seconds: float = 5.0,
+        half_open_max_calls: int = 1,
+        failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.failure_exceptions = failure_exceptions
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+        # Счётчики
+        self.rejected = 0
+        self.opened = 0
+        self.last_failure: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Разомкнут и пробовать ещё рано (не расходует пробные вызовы)"""
+        return self.state == OPEN
+
+    def allow(self) -> bool:
+        """Можно ли выполнить вызов; в half_open занимает слот пробного вызова"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._state == HALF_OPEN:
+            self._state = CLOSED
+
+    def record_failure(self, exc: Optional[BaseException] = None) -> None:
+        self._failures += 1
+        if exc is not None:
+            self.last_failure = repr(exc)
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        if self._state != OPEN:
+            self.opened += 1
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+
+    async def call(self, func: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        try:
+            result = await func(*args, **kwargs)
+        except self.failure_exceptions as e:
+            self.record_failure(e)
+            raise
+        except Exception:
+            # Зависимость ответила, пусть и ошибкой
+            self.record_success()
+            raise
+        except BaseException:
+            # Отмена ничего не говорит о здоровье зависимости, но слот пробного вызова освобождаем
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "last_failure": self.last_failure,
+        }
@@ -1,6 +1,6 @@
 from pathlib import Path
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,12 +16,96 @@ class Settings(BaseSettings):
     # База данных
     # ======================
     database_url: str
+    database_replica_url: Optional[str] = None   # реплика для GET-запросов; не задана — всё на primary
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 5.0             # ожидание соединения из пула, секунды
+    db_pool_recycle: int = 1800              # пересоздавать соединения старше, секунды (-1 — никогда)
+    db_pool_pre_ping: bool = False           # лишний round trip на каждую выдачу из пула
+    db_statement_cache_size: int = 100       # prepared statements asyncpg на соединение; 0 — для PgBouncer (transaction)
+    db_read_your_writes_seconds: int = 5     # после записи пользователь читает с primary
 
     # ======================
     # Redis
     # ======================
     redis_url: str
     redis_cache_ttl: int = 300
+    redis_max_connections: int = 100         # на воркер и на клиента (их два: строковый и бинарный)
+    redis_pool_timeout: float = 0.05         # ожидание свободного соединения, секунды
+    redis_socket_timeout: float = 0.5
+    redis_socket_connect_timeout: float = 0.25
+    redis_cache_socket_timeout: float = 0.1  # кэш заказов: не ответил быстро — идём в БД
+    redis_health_check_interval: int = 30
+
+    # ======================
+    # Circuit breaker для Redis
+    # ======================
+    redis_breaker_failure_threshold: int = 5   # ошибок подряд до размыкания
+    redis_breaker_open_seconds: float = 5.0    # сколько не ходить в Redis после размыкания
+    redis_breaker_half_open_max_calls: int = 1 # пробных вызовов после паузы
+
+    # ======================
+    # In-process кэш заказов (L1 перед Redis)
+    # ======================
+    order_cache_local_ttl: int = 5          # верхняя граница устаревания, если инвалидация потерялась
+    order_cache_local_max_size: int = 10_000
+    order_cache_invalidation_channel: str = "order_cache:invalidate"
+    order_cache_codec: str = "json"          # json | msgpack (нужен пакет msgpack)
+
+    # ======================
+    # Защита от stampede при промахах кэша заказов
+    # ======================
+    order_cache_lease_ms: int = 3000          # lease на загрузку из БД (между процессами)
+    order_cache_lease_wait: float = 1.0       # сколько ждать чужой загрузки, секунды
+    order_cache_xfetch_beta: float = 1.0      # >1 — обновлять раньше, 0 — выключить
+
+    # ======================
+    # Несуществующие заказы: negative cache и Bloom-фильтр
+    # ======================
+    order_cache_negative_ttl: int = 30
+    order_bloom_enabled: bool = False          # после включения — python -m src.commands.rebuild_order_bloom
+    order_bloom_capacity: int = 10_000_000
+    order_bloom_error_rate: float = 0.01
+
+    # ======================
+    # Прогрев кэша заказов
+    # ======================
+    order_cache_recent_reads_max: int = 10_000        # сколько недавно прочитанных id помнить
+    order_cache_recent_reads_flush_seconds: float = 10.0
+    order_cache_warm_recent_created: int = 1000
+
+    # ======================
+    # Частота чтений заказов (count-min sketch): допуск в кэш, TTL, закрепление в L1
+    # ======================
+    # Счётчики свои у каждого воркера: при W воркерах допуск — примерно с W × min_reads чтения,
+    # а горячим заказ становится по доле трафика одного воркера
+    order_hot_sketch_width: int = 65536
+    order_hot_sketch_depth: int = 4
+    order_hot_top_k: int = 100
+    order_cache_admission_min_reads: int = 2   # с какого чтения кэшировать заказ; 1 — кэшировать всё
+    order_cache_hot_min_reads: int = 20        # горячий (из top-K и не реже): TTL ×multiplier, закреплён в L1
+    order_cache_hot_ttl_multiplier: int = 6
+
+    # ======================
+    # Read model списков заказов пользователей (ZSET в Redis)
+    # ======================
+    user_orders_read_model_enabled: bool = True
+    user_orders_read_model_ttl: int = 3600    # от пересборки из БД; граница устаревания, если добавление потерялось
+
+    # ======================
+    # Idempotency-Key
+    # ======================
+    idempotency_ttl: int = 86400             # сколько хранится готовый ответ, секунды
+    idempotency_lock_ttl: int = 60           # маркер "в процессе" на случай падения воркера
+    idempotency_wait_seconds: float = 5.0    # сколько дубликат ждёт первый запрос
+
+    # ======================
+    # Кэш аутентифицированных пользователей
+    # ======================
+    user_cache_ttl: int = 300            # TTL записи в Redis, секунды
+    user_cache_local_ttl: int = 15       # TTL in-process кэша, секунды
+    user_cache_local_max_size: int = 10_000
+    user_cache_invalidation_guard_seconds: int = 10   # после инвалидации не кэшировать (гонка с чтением из БД)
 
     # ======================
     # Kafka
@@ -43,12 +127,23 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    # ======================
+    # Хеширование паролей
+    # ======================
+    password_hash_executor: str = "thread"   # thread | process
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64        # сверх этого — сразу 503
+
     # ======================
     # Приложение
     # ======================
     debug: bool = False
     cors_origins: List[str] = []
     rate_limit_per_minute: int = 60
+    order_batch_max_size: int = 500
+    order_bulk_update_max_size: int = 5000
+    order_multi_get_max_size: int = 100
+    order_search_max_page_size: int = 100
 
     # ======================
     # CORS
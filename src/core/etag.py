@@ -0,0 +1,58 @@
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional
+from uuid import UUID
+
+
+def _normalize_ts(value: datetime | str) -> str:
+    """Одинаковое представление времени из БД (datetime) и из кэша (строка)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.isoformat()
+
+
+def make_etag(*parts: object) -> str:
+    """Сильный ETag: хеш от упорядоченных частей"""
+    digest = hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def order_etag(version: int | str) -> str:
+    """ETag заказа — версия строки: по нему же If-Match проверяется в UPDATE без чтения"""
+    return f'"v{version}"'
+
+
+def if_match_version(if_match: str) -> Optional[int]:
+    """
+    Версия заказа из If-Match. None — для "*" (подойдёт любая версия).
+    ValueError, если заголовок не похож на ETag заказа: такой запрос заведомо получит 412.
+    """
+    if_match = if_match.strip()
+    if if_match == "*":
+        return None
+
+    # If-Match сравнивается строго: слабые ETag и списки из нескольких версий не принимаем
+    if not (if_match.startswith('"v') and if_match.endswith('"')):
+        raise ValueError(f"Unsupported If-Match: {if_match}")
+    return int(if_match[2:-1])
+
+
+def orders_list_etag(
+    orders: Iterable[tuple[UUID | str, datetime | str]], *extra: object
+) -> str:
+    """ETag списка: состав, порядок и версии заказов плюс метаданные страницы"""
+    parts = [f"{order_id}@{_normalize_ts(updated_at)}" for order_id, updated_at in orders]
+    return make_etag("orders", *parts, *extra)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверка If-None-Match (слабое сравнение, как требует RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
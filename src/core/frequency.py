@@ -0,0 +1,122 @@
+from array import array
+from typing import Dict, Generic, Hashable, List, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+_MASK64 = (1 << 64) - 1
+
+
+class FrequencySketch(Generic[K]):
+    """
+    Оценка частоты обращений к ключам (count-min sketch) с периодическим старением,
+    как в TinyLFU: после sample_size обращений все счётчики делятся пополам,
+    поэтому частота отражает недавнюю популярность, а не всю историю.
+    Деление идёт порциями по age_chunk столбцов на каждое следующее обращение,
+    чтобы не останавливать event loop проходом по всей таблице.
+    Оценка не занижается; завышение ограничено шириной таблицы.
+    Дополнительно помнит top_k самых частых ключей.
+    Не потокобезопасен — рассчитан на использование внутри одного event loop.
+    """
+
+    def __init__(
+        self,
+        width: int = 65536,
+        depth: int = 4,
+        top_k: int = 100,
+        sample_size: int = 0,
+        age_chunk: int = 1024,
+    ):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.sample_size = sample_size or width * 10
+        self.age_chunk = age_chunk
+        self._rows = [array("L", [0]) * width for _ in range(depth)]
+        self._additions = 0
+        self._aging_from = -1   # первый ещё не поделённый столбец; -1 — старение не идёт
+        self._top: Dict[K, int] = {}
+        self._top_min = 0
+
+        # Счётчики
+        self.resets = 0
+
+    def _indexes(self, key: K) -> List[int]:
+        # Двойное хеширование: одна hash() на ключ вместо depth независимых функций
+        h = hash(key) & _MASK64
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def increment(self, key: K) -> int:
+        """Учитывает обращение и возвращает новую оценку частоты"""
+        indexes = self._indexes(key)
+        current = min(row[i] for row, i in zip(self._rows, indexes))
+        # Conservative update: увеличиваем только минимальные счётчики — меньше завышение
+        for row, i in zip(self._rows, indexes):
+            if row[i] == current:
+                row[i] = current + 1
+        estimate = current + 1
+
+        self._update_top(key, estimate)
+        self._additions += 1
+        if self._aging_from >= 0:
+            self._age_step()
+        elif self._additions >= self.sample_size:
+            self._start_aging()
+        return estimate
+
+    def estimate(self, key: K) -> int:
+        return min(row[i] for row, i in zip(self._rows, self._indexes(key)))
+
+    def _update_top(self, key: K, estimate: int) -> None:
+        if key in self._top:
+            self._top[key] = estimate
+            return
+        if len(self._top) < self.top_k:
+            self._top[key] = estimate
+            self._top_min = min(self._top.values())
+            return
+        if estimate <= self._top_min:
+            return
+        coldest = min(self._top, key=self._top.__getitem__)
+        if estimate <= self._top[coldest]:
+            # _top_min устарел: ключи в top с тех пор стали чаще
+            self._top_min = self._top[coldest]
+            return
+        del self._top[coldest]
+        self._top[key] = estimate
+        self._top_min = min(self._top.values())
+
+    def _start_aging(self) -> None:
+        # top-K маленький — делим сразу; таблицу — порциями в _age_step
+        self._top = {key: count >> 1 for key, count in self._top.items() if count > 1}
+        self._top_min = min(self._top.values(), default=0)
+        self._additions //= 2
+        self.resets += 1
+        self._aging_from = 0
+        self._age_step()
+
+    def _age_step(self) -> None:
+        start = self._aging_from
+        end = min(start + self.age_chunk, self.width)
+        for row in self._rows:
+            row[start:end] = array("L", [count >> 1 for count in row[start:end]])
+        self._aging_from = end if end < self.width else -1
+
+    def in_top(self, key: K) -> bool:
+        return key in self._top
+
+    def top(self, limit: int = 0) -> List[Tuple[K, int]]:
+        """Самые частые ключи с оценкой частоты, по убыванию"""
+        items = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+        return items[:limit] if limit else items
+
+    def stats(self) -> dict:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "additions": self._additions,
+            "sample_size": self.sample_size,
+            "resets": self.resets,
+            "aging": self._aging_from >= 0,
+            "tracked_top": len(self._top),
+        }
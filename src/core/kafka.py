@@ -1,5 +1,6 @@
 from aiokafka import AIOKafkaProducer
 from contextlib import asynccontextmanager
+import asyncio
 import json
 import logging
 
@@ -49,4 +50,29 @@ async def publish_new_order(order_id: str, user_id: int):
         topic=settings.kafka_topic,
         value=value,
     )
-    log.info(f"Published new_order event for order {order_id}")
\ No newline at end of file
+    log.info(f"Published new_order event for order {order_id}")
+
+
+async def publish_new_orders(events: list[tuple[str, int]]):
+    """
+    Публикует пачку new_order событий: сообщения уходят в аккумулятор продюсера
+    без ожидания, и продюсер отправляет их одним батчем на партицию.
+    """
+    if not events:
+        return
+
+    producer = await get_producer()
+    futures = []
+    for order_id, user_id in events:
+        data = {
+            "event": "new_order",
+            "order_id": order_id,
+            "user_id": user_id,
+        }
+        futures.append(await producer.send(
+            topic=settings.kafka_topic,
+            value=json.dumps(data).encode("utf-8"),
+        ))
+
+    await asyncio.gather(*futures)
+    log.info(f"Published {len(events)} new_order events")
@@ -0,0 +1,139 @@
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.db.redis.session import CircuitOpenError, get_redis
+
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+# Скользящее окно на sorted set: одна команда EVALSHA на проверку.
+# Возвращает {разрешено, осталось, через сколько мс повторить}
+_SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+local count = redis.call('ZCARD', key)
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+    return {1, limit - count - 1, 0}
+end
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return {0, 0, window - (now - tonumber(oldest[2]))}
+"""
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """'10/minute' -> (10, 60000): лимит и окно в миллисекундах"""
+    amount, _, period = rate.partition("/")
+    period = period.strip().rstrip("s")
+    if period not in _PERIODS:
+        raise ValueError(f"Unsupported rate period: {rate}")
+    return int(amount), _PERIODS[period] * 1000
+
+
+def get_rate_limit_key(request: Request) -> str:
+    """Id аутентифицированного пользователя, иначе IP клиента"""
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is not None:
+        return f"user:{user_id}"
+    host = request.client.host if request.client else "127.0.0.1"
+    return f"ip:{host}"
+
+
+class RateLimiter:
+    """
+    Распределённый лимитер поверх Redis, общий для всех воркеров и роутеров.
+    Если Redis недоступен — считает локально, в памяти воркера.
+    """
+
+    def __init__(self, prefix: str = "ratelimit", local_max_keys: int = 100_000):
+        self.prefix = prefix
+        self._script = None
+        self._local: TTLCache[deque] = TTLCache(
+            max_size=local_max_keys, ttl_seconds=_PERIODS["day"]
+        )
+
+    async def _hit_redis(self, key: str, limit: int, window_ms: int) -> tuple[bool, int, int]:
+        redis = await get_redis()
+        if self._script is None:
+            self._script = redis.register_script(_SLIDING_WINDOW_LUA)
+
+        now_ms = int(time.time() * 1000)
+        allowed, remaining, retry_ms = await self._script(
+            keys=[key],
+            args=[now_ms, window_ms, limit, f"{now_ms}-{uuid.uuid4().hex[:8]}"],
+            client=redis,
+        )
+        return bool(allowed), int(remaining), int(retry_ms)
+
+    def _hit_local(self, key: str, limit: int, window_ms: int) -> tuple[bool, int, int]:
+        now_ms = time.monotonic() * 1000
+        hits = self._local.get(key)
+        if hits is None:
+            hits = deque()
+
+        while hits and hits[0] <= now_ms - window_ms:
+            hits.popleft()
+
+        if len(hits) < limit:
+            hits.append(now_ms)
+            # TTL от последнего попадания (как PEXPIRE в Redis): запись живёт, пока в окне есть попадания
+            self._local.set(key, hits, ttl_seconds=window_ms / 1000)
+            return True, limit - len(hits), 0
+        return False, 0, int(window_ms - (now_ms - hits[0]))
+
+    async def hit(self, key: str, limit: int, window_ms: int) -> tuple[bool, int, int]:
+        try:
+            return await self._hit_redis(key, limit, window_ms)
+        except CircuitOpenError:
+            return self._hit_local(key, limit, window_ms)
+        except Exception:
+            logger.warning("Rate limiter falls back to local counters", exc_info=True)
+            return self._hit_local(key, limit, window_ms)
+
+    def limit(self, rate: Optional[str] = None) -> Callable:
+        """
+        FastAPI-зависимость с лимитом вида '10/minute'.
+        По умолчанию — settings.rate_limit_per_minute.
+        """
+        amount, window_ms = parse_rate(rate or f"{settings.rate_limit_per_minute}/minute")
+
+        async def dependency(request: Request, response: Response) -> None:
+            route = request.scope.get("route")
+            scope = f"{request.method}:{route.path if route else request.url.path}"
+            key = f"{self.prefix}:{scope}:{get_rate_limit_key(request)}"
+
+            allowed, remaining, retry_ms = await self.hit(key, amount, window_ms)
+            if not allowed:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Rate limit exceeded",
+                    headers={"Retry-After": str(max(1, -(-retry_ms // 1000)))},
+                )
+
+            response.headers["X-RateLimit-Limit"] = str(amount)
+            response.headers["X-RateLimit-Remaining"] = str(remaining)
+
+        return dependency
+
+
+limiter = RateLimiter()
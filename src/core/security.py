@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,6 +9,8 @@ from passlib.context import CryptContext
 
 from src.core.config import settings
 
+log = logging.getLogger(__name__)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -13,6 +19,111 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+class PasswordHasherBusy(Exception):
+    """Очередь на хеширование переполнена"""
+
+
+class PasswordHasher:
+    """
+    Асинхронная обёртка над bcrypt: вычисления уходят в пул потоков/процессов,
+    чтобы не блокировать event loop. Число ожидающих задач ограничено —
+    при переполнении сразу бросается PasswordHasherBusy.
+    """
+
+    def __init__(self, executor_kind: str, workers: int, max_queue: int):
+        self.executor_kind = executor_kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+
+        # Метрики
+        self.calls = 0
+        self.rejected = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.queue_wait_seconds_total = 0.0
+        self.queue_wait_seconds_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+            log.info(f"Password hasher started ({self.executor_kind}, {self.workers} workers)")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        self._in_flight += 1
+        submitted_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result, finished_at = await loop.run_in_executor(
+                self._get_executor(), _timed, func, *args
+            )
+        finally:
+            self._in_flight -= 1
+
+        # perf_counter — монотонные часы хоста, сравнимы между потоками и процессами
+        hash_seconds = finished_at - started_at
+        queue_wait = max(started_at - submitted_at, 0.0)
+
+        self.calls += 1
+        self.hash_seconds_total += hash_seconds
+        self.hash_seconds_max = max(self.hash_seconds_max, hash_seconds)
+        self.queue_wait_seconds_total += queue_wait
+        self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, queue_wait)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def metrics(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "hash_seconds_avg": self.hash_seconds_total / self.calls if self.calls else 0.0,
+            "hash_seconds_max": self.hash_seconds_max,
+            "queue_wait_seconds_avg": self.queue_wait_seconds_total / self.calls if self.calls else 0.0,
+            "queue_wait_seconds_max": self.queue_wait_seconds_max,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            log.info("Password hasher stopped")
+
+
+def _timed(func, *args):
+    """Выполняется внутри пула: возвращает время старта/окончания вместе с результатом"""
+    started_at = time.perf_counter()
+    result = func(*args)
+    return started_at, result, time.perf_counter()
+
+
+password_hasher = PasswordHasher(
+    executor_kind=settings.password_hash_executor,
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
@@ -24,4 +135,4 @@ def decode_token(token: str) -> Optional[dict]:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
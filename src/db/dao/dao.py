@@ -1,28 +1,35 @@
-from typing import TypeVar, Generic, Optional, List, Type, Any
+from typing import TypeVar, Generic, Optional, List, Type, Any, AsyncIterator, Sequence
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.base import ExecutableOption
 
 from src.db.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+# Опции загрузки (selectinload/joinedload/load_only) передаются явно в каждый метод:
+# по умолчанию связи не подгружаются
+LoaderOptions = Sequence[ExecutableOption]
+
 
 class BaseDAO(Generic[ModelType]):
     def __init__(self, model: Type[ModelType], session: AsyncSession):
         self.model = model
         self.session = session
 
-    async def get(self, id: UUID) -> Optional[ModelType]:
+    async def get(self, id: UUID, options: LoaderOptions = ()) -> Optional[ModelType]:
         result = await self.session.execute(
-            select(self.model).where(self.model.id == id)
+            select(self.model).where(self.model.id == id).options(*options)
         )
         return result.scalar_one_or_none()
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
+    async def get_all(
+        self, skip: int = 0, limit: int = 100, options: LoaderOptions = ()
+    ) -> List[ModelType]:
         result = await self.session.execute(
-            select(self.model).offset(skip).limit(limit)
+            select(self.model).offset(skip).limit(limit).options(*options)
         )
         return list(result.scalars().all())
 
@@ -50,8 +57,21 @@ class BaseDAO(Generic[ModelType]):
         await self.session.commit()
         return result.rowcount > 0
 
-    async def filter_by(self, **kwargs) -> List[ModelType]:
+    async def filter_by(self, options: LoaderOptions = (), **kwargs) -> List[ModelType]:
         result = await self.session.execute(
-            select(self.model).filter_by(**kwargs)
+            select(self.model).filter_by(**kwargs).options(*options)
+        )
+        return list(result.scalars().all())
+
+    async def stream_filter_by(
+        self, batch_size: int = 1000, options: LoaderOptions = (), **kwargs
+    ) -> AsyncIterator[ModelType]:
+        """Как filter_by, но через серверный курсор: в памяти не больше batch_size строк"""
+        result = await self.session.stream_scalars(
+            select(self.model)
+            .filter_by(**kwargs)
+            .options(*options)
+            .execution_options(yield_per=batch_size)
         )
-        return list(result.scalars().all())
\ No newline at end of file
+        async for obj in result:
+            yield obj
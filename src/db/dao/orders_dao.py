@@ -1,22 +1,162 @@
-from typing import List
-from sqlalchemy import select
-from src.db.dao.dao import BaseDAO
-from src.db.models.order import Order, OrderStatus
+from datetime import datetime
+from typing import List, Optional, Tuple, AsyncIterator
+from uuid import UUID
+from sqlalchemy import select, insert, update, func, any_, bindparam, Uuid
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import load_only
+from src.db.dao.dao import BaseDAO, LoaderOptions
+from src.db.dao.pagination import apply_keyset, split_page
+from src.db.models.order import Order, OrderStatus, statuses_allowed_before
+from src.db.models.user import User  # noqa: F401 — нужен мапперу для Order.user (load_only в ORDER_VERSION_COLUMNS)
+
+
+# Минимальный набор колонок для ETag/курсора: проверка If-None-Match без чтения items
+ORDER_VERSION_COLUMNS: LoaderOptions = (
+    load_only(Order.id, Order.created_at, Order.updated_at),
+)
 
 
 class OrderDAO(BaseDAO[Order]):
-    async def get_user_orders(self, user_id: int) -> List[Order]:
+    async def get_user_orders(self, user_id: int, options: LoaderOptions = ()) -> List[Order]:
         result = await self.session.execute(
-            select(Order).where(Order.user_id == user_id)
+            select(Order).where(Order.user_id == user_id).options(*options)
         )
         return list(result.scalars().all())
 
-    async def get_by_status(self, status: OrderStatus) -> List[Order]:
+    async def get_many(self, ids: List[UUID], options: LoaderOptions = ()) -> List[Order]:
+        """Заказы по списку id одним запросом WHERE id IN (...)"""
+        if not ids:
+            return []
         result = await self.session.execute(
-            select(Order).where(Order.status == status)
+            select(Order).where(Order.id.in_(ids)).options(*options)
         )
         return list(result.scalars().all())
 
+    async def get_user_orders_page(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        options: LoaderOptions = (),
+    ) -> Tuple[List[Order], Optional[str]]:
+        """Страница заказов пользователя по индексу (user_id, created_at DESC, id DESC)"""
+        stmt = apply_keyset(
+            select(Order).where(Order.user_id == user_id).options(*options),
+            Order, cursor, limit,
+        )
+        result = await self.session.execute(stmt)
+        return split_page(result.scalars().all(), limit)
+
+    async def get_user_order_keys(self, user_id: int) -> List[Tuple[UUID, datetime]]:
+        """(id, created_at) всех заказов пользователя — только из индекса, без items"""
+        result = await self.session.execute(
+            select(Order.id, Order.created_at).where(Order.user_id == user_id)
+        )
+        return [(order_id, created_at) for order_id, created_at in result.all()]
+
+    async def count_user_orders(self, user_id: int) -> int:
+        result = await self.session.execute(
+            select(func.count()).select_from(Order).where(Order.user_id == user_id)
+        )
+        return result.scalar_one()
+
+    async def get_by_product(
+        self,
+        product_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        options: LoaderOptions = (),
+    ) -> Tuple[List[Order], Optional[str]]:
+        """
+        Заказы, в которых есть товар product_id, от новых к старым.
+        items @> '[{"product_id": ...}]' отбирается по GIN-индексу ix_orders_items (jsonb_path_ops)
+        """
+        stmt = apply_keyset(
+            select(Order)
+            .where(Order.items.contains([{"product_id": product_id}]))
+            .options(*options),
+            Order, cursor, limit,
+        )
+        result = await self.session.execute(stmt)
+        return split_page(result.scalars().all(), limit)
+
+    async def search(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        user_id: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        min_total: Optional[float] = None,
+        max_total: Optional[float] = None,
+        options: LoaderOptions = (),
+    ) -> Tuple[List[Order], Optional[str]]:
+        """
+        Поиск с комбинируемыми фильтрами и keyset-пагинацией.
+        Каждая комбинация попадает в один из составных индексов:
+        (status, created_at), (user_id, created_at), (created_at), (status, total_price)
+        и частичный индекс по pending.
+        """
+        stmt = select(Order).options(*options)
+        if status is not None:
+            stmt = stmt.where(Order.status == status)
+        if user_id is not None:
+            stmt = stmt.where(Order.user_id == user_id)
+        if created_from is not None:
+            stmt = stmt.where(Order.created_at >= created_from)
+        if created_to is not None:
+            stmt = stmt.where(Order.created_at < created_to)
+        if min_total is not None:
+            stmt = stmt.where(Order.total_price >= min_total)
+        if max_total is not None:
+            stmt = stmt.where(Order.total_price <= max_total)
+
+        result = await self.session.execute(apply_keyset(stmt, Order, cursor, limit))
+        return split_page(result.scalars().all(), limit)
+
+    async def get_recent(self, limit: int, options: LoaderOptions = ()) -> List[Order]:
+        """Последние созданные заказы (индекс ix_orders_created_at)"""
+        result = await self.session.execute(
+            select(Order)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(limit)
+            .options(*options)
+        )
+        return list(result.scalars().all())
+
+    async def get_by_status(self, status: OrderStatus, options: LoaderOptions = ()) -> List[Order]:
+        result = await self.session.execute(
+            select(Order).where(Order.status == status).options(*options)
+        )
+        return list(result.scalars().all())
+
+    async def stream_orders(
+        self,
+        user_id: Optional[int] = None,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        batch_size: int = 1000,
+        options: LoaderOptions = (),
+    ) -> AsyncIterator[Order]:
+        """Потоковая выборка заказов серверным курсором (для выгрузок)"""
+        stmt = select(Order).options(*options)
+        if user_id is not None:
+            stmt = stmt.where(Order.user_id == user_id)
+        if status is not None:
+            stmt = stmt.where(Order.status == status)
+        if created_from is not None:
+            stmt = stmt.where(Order.created_at >= created_from)
+        if created_to is not None:
+            stmt = stmt.where(Order.created_at < created_to)
+
+        result = await self.session.stream_scalars(
+            stmt.order_by(Order.created_at, Order.id).execution_options(yield_per=batch_size)
+        )
+        async for order in result:
+            yield order
+
     async def create(self, obj_in: dict, user_id: int) -> Order:
         create_data = obj_in.copy()           # чтобы не менять оригинальный словарь
         create_data["user_id"] = user_id
@@ -24,4 +164,95 @@ class OrderDAO(BaseDAO[Order]):
         self.session.add(db_obj)
         await self.session.commit()
         await self.session.refresh(db_obj)
-        return db_obj
\ No newline at end of file
+        return db_obj
+
+    async def create_many(self, objs_in: List[dict], user_id: int) -> List[Order]:
+        """Один multi-row INSERT ... RETURNING; порядок строк совпадает с objs_in"""
+        rows = [{**obj_in, "user_id": user_id} for obj_in in objs_in]
+        result = await self.session.scalars(
+            insert(Order).returning(Order, sort_by_parameter_order=True),
+            rows,
+        )
+        orders = list(result.all())
+        await self.session.commit()
+        return orders
+
+
+    async def transition_status(
+        self, id: UUID, status: OrderStatus, expected_version: Optional[int] = None
+    ) -> Optional[Tuple[Order, OrderStatus]]:
+        """
+        Переход статуса одним запросом, без блокировок:
+        WITH prev AS (SELECT ... WHERE id AND status IN (:allowed_from) [AND version = :v])
+        UPDATE ... WHERE version = prev.version RETURNING.
+        Условие на версию из того же снимка отсекает параллельную запись между чтением prev
+        и UPDATE — предыдущий статус в ответе всегда соответствует тому, что перезаписали.
+        Возвращает (обновлённый заказ, предыдущий статус) или None, если условие не выполнено.
+        """
+        conditions = [Order.id == id, Order.status.in_(statuses_allowed_before(status))]
+        if expected_version is not None:
+            conditions.append(Order.version == expected_version)
+        prev = select(Order.id, Order.status, Order.version).where(*conditions).cte("prev")
+
+        result = await self.session.execute(
+            update(Order)
+            .where(Order.id == prev.c.id, Order.version == prev.c.version)
+            .values(status=status, version=Order.version + 1)
+            .returning(Order, prev.c.status.label("previous_status"))
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        await self.session.commit()
+        return (row[0], row[1]) if row else None
+
+    async def get_state(self, id: UUID) -> Optional[Tuple[OrderStatus, int]]:
+        """Текущие статус и версия заказа — для разбора неудавшегося перехода"""
+        result = await self.session.execute(
+            select(Order.status, Order.version).where(Order.id == id)
+        )
+        row = result.one_or_none()
+        return (row.status, row.version) if row else None
+
+    async def bulk_update_status(
+        self, ids: List[UUID], status: OrderStatus
+    ) -> Tuple[List[Tuple[Order, OrderStatus]], List[UUID], List[UUID]]:
+        """
+        Один запрос для всех заказов, которым разрешён переход в status:
+        WITH prev AS (SELECT ... WHERE id = ANY(:ids) FOR UPDATE) UPDATE ... RETURNING.
+        Возвращает ([(обновлённый заказ, предыдущий статус)], несуществующие id, отклонённые id).
+        """
+        ids = list(dict.fromkeys(ids))
+        prev = (
+            select(Order.id, Order.status)
+            .where(
+                Order.id == any_(bindparam("ids", ids, type_=ARRAY(Uuid))),
+                Order.status.in_(statuses_allowed_before(status)),
+            )
+            .with_for_update()
+            .cte("prev")
+        )
+        result = await self.session.execute(
+            update(Order)
+            .where(Order.id == prev.c.id)
+            .values(status=status, version=Order.version + 1)
+            .returning(Order, prev.c.status.label("previous_status"))
+            .execution_options(synchronize_session=False)
+        )
+        updated = [(order, previous_status) for order, previous_status in result.all()]
+        await self.session.commit()
+
+        # Отдельный запрос нужен только если что-то не обновилось
+        updated_ids = {order.id for order, _ in updated}
+        not_updated = [id for id in ids if id not in updated_ids]
+        if not not_updated:
+            return updated, [], []
+
+        existing = await self.session.execute(
+            select(Order.id).where(
+                Order.id == any_(bindparam("ids", not_updated, type_=ARRAY(Uuid)))
+            )
+        )
+        existing_ids = set(existing.scalars().all())
+        missing = [id for id in not_updated if id not in existing_ids]
+        rejected = [id for id in not_updated if id in existing_ids]
+        return updated, missing, rejected
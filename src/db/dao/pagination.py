@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from sqlalchemy import Select, tuple_
+
+T = TypeVar("T")
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Непрозрачный курсор: позиция последнего элемента страницы"""
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(id)})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Разбирает курсор; при любом повреждении бросает ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["c"]), UUID(data["i"])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def apply_keyset(stmt: Select, model, cursor: Optional[str], limit: int) -> Select:
+    """
+    Keyset-пагинация по (created_at DESC, id DESC).
+    Берём limit + 1 строку, чтобы понять, есть ли следующая страница.
+    """
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, id))
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence[T], limit: int) -> Tuple[list[T], Optional[str]]:
+    """Отрезает лишнюю строку и строит курсор следующей страницы"""
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
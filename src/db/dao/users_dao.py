@@ -1,7 +1,13 @@
+from typing import Optional
+
 from sqlalchemy import select
 
 from src.db.dao.dao import BaseDAO
 from src.db.models.user import User
+from src.db.redis.user_cache import invalidate_cached_user
+
+# Поля, изменение которых влияет на закэшированного принципала
+PRINCIPAL_FIELDS = {"email", "is_active", "is_admin"}
 
 
 class UserDAO(BaseDAO[User]):
@@ -9,4 +15,23 @@ class UserDAO(BaseDAO[User]):
         result = await self.session.execute(
             select(User).where(User.email == email)
         )
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+
+    async def update(self, id: int, obj_in: dict) -> Optional[User]:
+        previous_email = None
+        if PRINCIPAL_FIELDS & obj_in.keys():
+            previous = await self.get(id)
+            previous_email = previous.email if previous else None
+
+        user = await super().update(id, obj_in)
+
+        if previous_email:
+            await invalidate_cached_user(previous_email)
+        return user
+
+    async def delete(self, id: int) -> bool:
+        user = await self.get(id)
+        deleted = await super().delete(id)
+        if deleted and user:
+            await invalidate_cached_user(user.email)
+        return deleted
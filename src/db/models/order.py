@@ -1,7 +1,8 @@
-from sqlalchemy import String, Float, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import String, Float, Integer, ForeignKey, Enum as SQLEnum, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
-from typing import TYPE_CHECKING, Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any, Set
 
 from src.db.base import BaseUUID
 
@@ -17,6 +18,23 @@ class OrderStatus(str, enum.Enum):
     CANCELED = "canceled"
 
 
+# Допустимые переходы статусов: pending → paid → shipped, pending/paid → canceled
+ORDER_STATUS_TRANSITIONS: Dict[OrderStatus, Set[OrderStatus]] = {
+    OrderStatus.PENDING: {OrderStatus.PAID, OrderStatus.CANCELED},
+    OrderStatus.PAID: {OrderStatus.SHIPPED, OrderStatus.CANCELED},
+    OrderStatus.SHIPPED: set(),
+    OrderStatus.CANCELED: set(),
+}
+
+
+def statuses_allowed_before(target: OrderStatus) -> Set[OrderStatus]:
+    """Статусы, из которых разрешён переход в target"""
+    return {
+        source for source, targets in ORDER_STATUS_TRANSITIONS.items()
+        if target in targets
+    }
+
+
 class Order(BaseUUID):
     """Модель заказа"""
     __tablename__ = "orders"
@@ -28,9 +46,10 @@ class Order(BaseUUID):
         index=True
     )
 
-    # Товары в JSON формате (как в ТЗ: items (JSON, список товаров))
+    # Товары в JSON формате (как в ТЗ: items (JSON, список товаров)).
+    # JSONB — чтобы искать заказы по товару через GIN-индекс (см. ниже)
     items: Mapped[List[Dict[str, Any]]] = mapped_column(
-        JSON,
+        JSONB,
         nullable=False,
         default=list
     )
@@ -41,17 +60,27 @@ class Order(BaseUUID):
         nullable=False
     )
 
+    # Одиночный индекс по статусу бесполезен (4 значения) — см. составные индексы ниже
     status: Mapped[OrderStatus] = mapped_column(
         SQLEnum(OrderStatus),
         default=OrderStatus.PENDING,
         nullable=False,
-        index=True
     )
 
-    # Связь с пользователем
+    # Версия строки для оптимистичной блокировки: +1 при каждой смене статуса,
+    # наружу отдаётся как ETag и сверяется с If-Match
+    version: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default="1",
+    )
+
+    # Связь с пользователем: по умолчанию не загружается (ни один ответ её не использует).
+    # Нужна — передайте в DAO options=[selectinload(Order.user)] или joinedload(Order.user)
     user: Mapped["User"] = relationship(
         "User",
-        lazy="joined"  # Всегда загружаем пользователя с заказом
+        lazy="noload"
     )
 
     def __repr__(self) -> str:
@@ -70,4 +99,50 @@ class Order(BaseUUID):
     @property
     def can_be_canceled(self) -> bool:
         """Можно ли отменить заказ"""
-        return self.status in [OrderStatus.PENDING, OrderStatus.PAID]
\ No newline at end of file
+        return self.can_transition_to(OrderStatus.CANCELED)
+
+    def can_transition_to(self, target: OrderStatus) -> bool:
+        """Разрешён ли переход из текущего статуса в target"""
+        return target in ORDER_STATUS_TRANSITIONS[self.status]
+
+
+# Keyset-пагинация заказов пользователя: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+Index(
+    "ix_orders_user_id_created_at",
+    Order.user_id,
+    Order.created_at.desc(),
+    Order.id.desc(),
+)
+
+# Поиск заказов (keyset по created_at DESC, id DESC)
+Index(
+    "ix_orders_status_created_at",
+    Order.status,
+    Order.created_at.desc(),
+    Order.id.desc(),
+)
+Index(
+    "ix_orders_created_at",
+    Order.created_at.desc(),
+    Order.id.desc(),
+)
+Index(
+    "ix_orders_status_total_price",
+    Order.status,
+    Order.total_price,
+)
+# Очередь необработанных заказов — небольшая доля таблицы
+Index(
+    "ix_orders_pending_created_at",
+    Order.created_at.desc(),
+    Order.id.desc(),
+    postgresql_where=Order.status == OrderStatus.PENDING,
+)
+# Заказы с товаром: items @> '[{"product_id": ...}]'.
+# jsonb_path_ops меньше и быстрее стандартного jsonb_ops, но умеет только @>
+Index(
+    "ix_orders_items",
+    Order.items,
+    postgresql_using="gin",
+    postgresql_ops={"items": "jsonb_path_ops"},
+)
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import math
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+from src.core.config import settings
+from src.db.redis.session import CircuitOpenError, get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Bloom-фильтр в одной Redis-строке: k бит на элемент, проверка — один BITFIELD GET.
+    "Нет" — точно нет, "да" — возможно (с вероятностью ошибки error_rate при capacity элементов).
+    Фильтру доверяют только после полной загрузки (ключ ready): до этого might_contain
+    всегда отвечает "возможно". Если элемент не удалось добавить, фильтр снимается
+    с готовности, как только Redis снова доступен: иначе он отвечал бы "точно нет"
+    для существующего элемента.
+    """
+
+    def __init__(self, name: str, capacity: int, error_rate: float):
+        self.bits_key = f"{name}:bits"
+        self.ready_key = f"{name}:ready"
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._invalidation_pending = False
+
+    def _offsets(self, value: UUID) -> List[int]:
+        """Двойное хеширование: h1 + i * h2"""
+        digest = hashlib.blake2b(value.bytes, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    async def add(self, values: Iterable[UUID]) -> None:
+        """Добавляет элементы одним pipeline (BITFIELD SET на элемент); ошибки Redis — наружу"""
+        values = list(values)
+        if not values:
+            return
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for value in values:
+                args = []
+                for offset in self._offsets(value):
+                    args += ["SET", "u1", offset, 1]
+                pipe.execute_command("BITFIELD", self.bits_key, *args)
+            await pipe.execute()
+
+    async def add_or_invalidate(self, values: Iterable[UUID]) -> None:
+        """Как add, но не падает: не записали — фильтр будет снят с готовности"""
+        values = list(values)
+        if not values:
+            return
+        await self.invalidate_if_pending()
+        try:
+            await self.add(values)
+        except CircuitOpenError:
+            self._invalidation_pending = True
+        except Exception:
+            self._invalidation_pending = True
+            logger.error(f"Failed to add {len(values)} values to {self.bits_key}", exc_info=True)
+
+    async def invalidate_if_pending(self) -> None:
+        """Снимает признак готовности после неудачного add (до следующей полной загрузки)"""
+        if not self._invalidation_pending:
+            return
+        try:
+            redis = await get_redis()
+            await redis.delete(self.ready_key)
+        except CircuitOpenError:
+            return
+        except Exception:
+            logger.error(f"Failed to invalidate {self.ready_key}", exc_info=True)
+            return
+        self._invalidation_pending = False
+        logger.warning(f"{self.ready_key} cleared after a failed add: rebuild the filter to use it again")
+
+    async def might_contain(self, value: UUID) -> Optional[bool]:
+        """False — точно нет; True — возможно есть; None — фильтр не готов или Redis недоступен"""
+        await self.invalidate_if_pending()
+        if self._invalidation_pending:
+            return None
+        args = []
+        for offset in self._offsets(value):
+            args += ["GET", "u1", offset]
+        try:
+            redis = await get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.exists(self.ready_key)
+                pipe.execute_command("BITFIELD", self.bits_key, *args)
+                ready, bits = await pipe.execute()
+        except CircuitOpenError:
+            return None
+        except Exception:
+            logger.error(f"Failed to check {self.bits_key}", exc_info=True)
+            return None
+
+        if not ready:
+            return None
+        return all(bits)
+
+    async def mark_ready(self) -> None:
+        redis = await get_redis()
+        await redis.set(self.ready_key, "1")
+
+    async def reset(self) -> None:
+        """Удаляет фильтр; до следующей полной загрузки ему не доверяют"""
+        redis = await get_redis()
+        await redis.delete(self.ready_key, self.bits_key)
+
+
+order_bloom = BloomFilter(
+    "order_bloom",
+    capacity=settings.order_bloom_capacity,
+    error_rate=settings.order_bloom_error_rate,
+)
@@ -0,0 +1,55 @@
+from typing import Any, Dict, Protocol
+
+from pydantic_core import from_json, to_json
+
+try:
+    import msgpack
+except ImportError:  # необязательная зависимость
+    msgpack = None
+
+
+class OrderCacheCodec(Protocol):
+    """Кодек тела записи заказа в кэше: словарь из JSON-совместимых значений <-> байты"""
+    name: str
+
+    def encode(self, payload: Dict[str, Any]) -> bytes: ...
+
+    def decode(self, raw: bytes) -> Dict[str, Any]: ...
+
+
+class JSONCodec:
+    """JSON через pydantic-core: без дополнительных зависимостей"""
+    name = "json"
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        return to_json(payload)
+
+    def decode(self, raw: bytes) -> Dict[str, Any]:
+        return from_json(raw)
+
+
+class MsgpackCodec:
+    """MessagePack: компактнее JSON на числах; требует пакет msgpack"""
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        return msgpack.packb(payload, use_bin_type=True)
+
+    def decode(self, raw: bytes) -> Dict[str, Any]:
+        return msgpack.unpackb(raw, raw=False)
+
+
+CODECS = {
+    JSONCodec.name: JSONCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+
+
+def get_codec(name: str) -> OrderCacheCodec:
+    if name not in CODECS:
+        raise ValueError(f"Unknown order cache codec: {name}")
+    return CODECS[name]()
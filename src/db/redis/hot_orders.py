@@ -0,0 +1,74 @@
+from typing import Any, Dict, List
+from uuid import UUID
+
+from src.core.config import settings
+from src.core.frequency import FrequencySketch
+
+
+# Частота чтений заказов в текущем воркере: решает, кэшировать ли заказ,
+# на какой TTL и закреплять ли его в L1. Воркеры не делят счётчики: каждый видит
+# только свою долю чтений (см. order_cache_admission_min_reads в config)
+order_heat: FrequencySketch[str] = FrequencySketch(
+    width=settings.order_hot_sketch_width,
+    depth=settings.order_hot_sketch_depth,
+    top_k=settings.order_hot_top_k,
+)
+
+# Чтения и попадания в кэш — только для ключей из top-K
+_top_reads: Dict[str, List[int]] = {}
+
+_stats = {"admitted": 0, "rejected": 0}
+
+
+def record_order_read(order_id: str, hit: bool) -> int:
+    """Учитывает чтение заказа; возвращает оценку его частоты"""
+    frequency = order_heat.increment(order_id)
+    if order_heat.in_top(order_id):
+        counters = _top_reads.setdefault(order_id, [0, 0])
+        counters[0] += 1
+        counters[1] += hit
+        if len(_top_reads) > 2 * order_heat.top_k:
+            for stale in [key for key in _top_reads if not order_heat.in_top(key)]:
+                del _top_reads[stale]
+    return frequency
+
+
+def admit_order(frequency: int) -> bool:
+    """Кэшировать ли заказ после промаха: разовые чтения не вытесняют горячие заказы"""
+    admitted = frequency >= settings.order_cache_admission_min_reads
+    _stats["admitted" if admitted else "rejected"] += 1
+    return admitted
+
+
+def is_hot_order(order_id: str | UUID) -> bool:
+    order_id_str = str(order_id)
+    return (
+        order_heat.in_top(order_id_str)
+        and order_heat.estimate(order_id_str) >= settings.order_cache_hot_min_reads
+    )
+
+
+def order_cache_ttl(order_id: str | UUID) -> int:
+    """TTL записи в Redis: горячим заказам — в order_cache_hot_ttl_multiplier раз дольше"""
+    if is_hot_order(order_id):
+        return settings.redis_cache_ttl * settings.order_cache_hot_ttl_multiplier
+    return settings.redis_cache_ttl
+
+
+def hot_orders(limit: int) -> List[Dict[str, Any]]:
+    """Самые читаемые заказы воркера: оценка частоты и доля попаданий в кэш"""
+    result = []
+    for order_id, frequency in order_heat.top(limit):
+        reads, hits = _top_reads.get(order_id, (0, 0))
+        result.append({
+            "order_id": order_id,
+            "frequency": frequency,
+            "hot": frequency >= settings.order_cache_hot_min_reads,
+            "reads": reads,
+            "hit_rate": hits / reads if reads else None,
+        })
+    return result
+
+
+def hot_orders_metrics() -> Dict[str, Any]:
+    return {"sketch": order_heat.stats(), **_stats}
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from typing import Optional, Tuple
+
+from src.core.config import settings
+from src.db.redis.session import CircuitOpenError, get_redis
+
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 0.05
+
+# Удаляем маркер, только если он всё ещё наш и запрос не завершён
+_RELEASE_LUA = """
+local value = redis.call('GET', KEYS[1])
+if value and cjson.decode(value)['token'] == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Отмечаем побочный эффект ответа выполненным, сохраняя TTL ответа
+_MARK_PUBLISHED_LUA = """
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return 0
+end
+local stored = cjson.decode(value)
+if stored['state'] ~= 'done' then
+    return 0
+end
+stored['published'] = true
+redis.call('SET', KEYS[1], cjson.encode(stored), 'KEEPTTL')
+return 1
+"""
+
+
+class IdempotencyKeyReused(Exception):
+    """Ключ уже использован с другим телом запроса"""
+
+
+class IdempotencyInProgress(Exception):
+    """Первый запрос с этим ключом ещё не завершился"""
+
+
+def request_fingerprint(payload: str) -> str:
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IdempotentRequest:
+    """
+    Идемпотентное выполнение запроса по Idempotency-Key.
+
+    begin() ставит маркер "в процессе" (SET NX) или возвращает сохранённый ответ;
+    complete() сохраняет ответ с TTL; release() снимает маркер при ошибке,
+    чтобы клиент мог повторить запрос.
+    Ответ можно сохранить с published=False до побочного эффекта после коммита
+    (публикации события): пока mark_published() не вызван, повтор видит published=False
+    и должен довыполнить его.
+    """
+
+    def __init__(self, scope: str, key: str, fingerprint: str):
+        self.redis_key = f"idempotency:{scope}:{key}"
+        self.fingerprint = fingerprint
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+        self.published = True
+
+    async def begin(self) -> Optional[Tuple[int, bytes]]:
+        """
+        None — запрос нужно выполнить; (status_code, body) — готовый ответ первого запроса.
+        Если Redis недоступен, запрос выполняется без защиты от дублей.
+        """
+        try:
+            redis = await get_redis()
+            marker = json.dumps({
+                "state": "in_progress",
+                "fingerprint": self.fingerprint,
+                "token": self.token,
+            })
+            if await redis.set(self.redis_key, marker, nx=True, ex=settings.idempotency_lock_ttl):
+                self.acquired = True
+                return None
+
+            deadline = asyncio.get_running_loop().time() + settings.idempotency_wait_seconds
+            while True:
+                raw = await redis.get(self.redis_key)
+                if raw is None:
+                    # Первый запрос упал и снял маркер — пробуем занять ключ сами
+                    if await redis.set(self.redis_key, marker, nx=True, ex=settings.idempotency_lock_ttl):
+                        self.acquired = True
+                        return None
+                    continue
+
+                stored = json.loads(raw)
+                if stored["fingerprint"] != self.fingerprint:
+                    raise IdempotencyKeyReused()
+                if stored["state"] == "done":
+                    self.published = stored.get("published", True)
+                    return stored["status_code"], stored["body"].encode("utf-8")
+
+                if asyncio.get_running_loop().time() >= deadline:
+                    raise IdempotencyInProgress()
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+        except (IdempotencyKeyReused, IdempotencyInProgress):
+            raise
+        except CircuitOpenError:
+            return None
+        except Exception:
+            logger.error(f"Idempotency check failed for {self.redis_key}", exc_info=True)
+            return None
+
+    async def complete(self, status_code: int, body: bytes, published: bool = True) -> None:
+        if not self.acquired:
+            return
+        try:
+            redis = await get_redis()
+            await redis.set(
+                self.redis_key,
+                json.dumps({
+                    "state": "done",
+                    "fingerprint": self.fingerprint,
+                    "token": self.token,
+                    "status_code": status_code,
+                    "body": body.decode("utf-8"),
+                    "published": published,
+                }),
+                ex=settings.idempotency_ttl,
+            )
+        except CircuitOpenError:
+            return
+        except Exception:
+            logger.error(f"Failed to store idempotent response {self.redis_key}", exc_info=True)
+
+    async def mark_published(self) -> None:
+        """Побочный эффект сохранённого ответа выполнен — повторы больше его не повторяют"""
+        try:
+            redis = await get_redis()
+            await redis.eval(_MARK_PUBLISHED_LUA, 1, self.redis_key)
+        except CircuitOpenError:
+            return
+        except Exception:
+            logger.error(f"Failed to mark idempotent response {self.redis_key} published", exc_info=True)
+
+    async def release(self) -> None:
+        if not self.acquired:
+            return
+        try:
+            redis = await get_redis()
+            await redis.eval(_RELEASE_LUA, 1, self.redis_key, self.token)
+        except CircuitOpenError:
+            return
+        except Exception:
+            logger.error(f"Failed to release idempotency key {self.redis_key}", exc_info=True)
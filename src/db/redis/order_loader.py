@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from src.core.config import settings
+from src.core.singleflight import SingleFlight
+from src.db.dao.orders_dao import OrderDAO
+from src.db.models.order import Order
+from src.db.redis.bloom import order_bloom
+from src.db.redis.redis_utils import (
+    ORDER_NOT_FOUND,
+    cache_order,
+    cache_orders_not_found,
+    get_cached_order,
+    order_cache_record,
+    order_to_dict,
+)
+from src.db.redis.hot_orders import admit_order, order_cache_ttl, record_order_read
+from src.db.redis.session import CircuitOpenError, get_redis, redis_available
+from src.db.session import async_read_session, async_session, replica_engine
+
+
+logger = logging.getLogger(__name__)
+
+# Снимаем lease, только если он всё ещё наш (мог истечь и достаться другому процессу)
+_RELEASE_LEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Одна загрузка из БД на заказ в пределах процесса
+_flights: SingleFlight[Optional[Dict[str, Any]]] = SingleFlight()
+
+# Фоновые обновления: держим ссылки, чтобы задачи не собрал GC
+_refreshes: Set[asyncio.Task] = set()
+
+_stats = {
+    "early_refreshes": 0,
+    "lease_waits": 0,
+    "lease_wait_hits": 0,
+    "not_found_loads": 0,
+    "bloom_rejections": 0,
+}
+
+# Недавно прочитанные заказы (для прогрева): копим в памяти воркера
+# и раз в order_cache_recent_reads_flush_seconds сбрасываем в общий ZSET
+RECENT_READS_KEY = "orders:recent_reads"
+_recent_reads: Dict[str, float] = {}
+
+
+def _lease_key(order_id: str) -> str:
+    return f"order_lease:{order_id}"
+
+
+def should_refresh_early(cached: Dict[str, Any], beta: float = settings.order_cache_xfetch_beta) -> bool:
+    """
+    Вероятностное раннее обновление (XFetch): чем ближе истечение и чем дольше
+    загрузка из БД (delta), тем выше шанс обновить запись заранее.
+    """
+    delta = cached.get("delta") or 0.0
+    expires_at = cached.get("expires_at") or 0.0
+    if not delta or not expires_at:
+        return False
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+async def _acquire_lease(order_id: str, token: str) -> Optional[bool]:
+    """True — lease наш, False — занят другим процессом, None — Redis недоступен"""
+    try:
+        redis = await get_redis()
+        acquired = await redis.set(
+            _lease_key(order_id), token, nx=True, px=settings.order_cache_lease_ms
+        )
+        return bool(acquired)
+    except CircuitOpenError:
+        return None
+    except Exception:
+        logger.error(f"Failed to acquire cache lease for order {order_id}", exc_info=True)
+        return None
+
+
+async def _release_lease(order_id: str, token: str) -> None:
+    try:
+        redis = await get_redis()
+        await redis.eval(_RELEASE_LEASE_LUA, 1, _lease_key(order_id), token)
+    except CircuitOpenError:
+        pass
+    except Exception:
+        logger.error(f"Failed to release cache lease for order {order_id}", exc_info=True)
+
+
+async def _wait_for_fill(order_id: str) -> Optional[Dict[str, Any]]:
+    """Ждём, пока владелец lease положит заказ в кэш"""
+    _stats["lease_waits"] += 1
+    deadline = time.monotonic() + settings.order_cache_lease_wait
+    while time.monotonic() < deadline and redis_available():
+        await asyncio.sleep(0.025)
+        cached = await get_cached_order(order_id)
+        if cached is not None:
+            _stats["lease_wait_hits"] += 1
+            return cached
+    return None
+
+
+async def _load(order_id: str, admit: bool = True, primary: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Загрузка заказа из БД с кэшированием. Между процессами — короткий lease в Redis:
+    остальные процессы ждут результат в кэше, а не идут в БД.
+    admit=False — редкий заказ: в кэш не кладём и lease не берём (ждать заполнения некому).
+    Своя сессия (с реплики, если она есть): загрузку разделяют несколько запросов,
+    и она не должна зависеть от их жизни.
+    primary=True — читаем с primary и не ждём чужой загрузки: она могла прийти с отстающей реплики.
+    """
+    token = uuid.uuid4().hex
+    lease = await _acquire_lease(order_id, token) if admit and not primary else None
+    if lease is False:
+        # При раннем обновлении здесь сразу вернётся ещё действительная старая запись
+        cached = await _wait_for_fill(order_id)
+        if cached is not None:
+            return None if cached is ORDER_NOT_FOUND else cached
+        # Владелец lease не успел — грузим сами
+
+    try:
+        started_at = time.perf_counter()
+        async with (async_session if primary else async_read_session)() as session:
+            db_order = await OrderDAO(Order, session).get(UUID(order_id))
+        if db_order is None and replica_engine is not None and not primary:
+            # Реплика могла ещё не получить новый заказ — 404 кэшируем только по primary
+            async with async_session() as session:
+                db_order = await OrderDAO(Order, session).get(UUID(order_id))
+        if db_order is None:
+            _stats["not_found_loads"] += 1
+            await cache_orders_not_found([order_id])
+            return None
+
+        if not admit:
+            return order_cache_record(order_id, order_to_dict(db_order))
+        return await cache_order(
+            order_id,
+            order_to_dict(db_order),
+            ttl_seconds=order_cache_ttl(order_id),
+            delta=time.perf_counter() - started_at,
+        )
+    finally:
+        if lease:
+            await _release_lease(order_id, token)
+
+
+def _schedule_refresh(order_id: str) -> None:
+    if _flights.in_flight(order_id):
+        return
+    _stats["early_refreshes"] += 1
+    task = asyncio.ensure_future(_flights.do(order_id, lambda: _load(order_id)))
+    _refreshes.add(task)
+    task.add_done_callback(_on_refresh_done)
+
+
+def _on_refresh_done(task: asyncio.Task) -> None:
+    _refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Early order cache refresh failed", exc_info=task.exception())
+
+
+def record_read(order_id_str: str, hit: bool) -> int:
+    """
+    Учитывает чтение заказа: частота (допуск, TTL, закрепление) и прогрев.
+    Отдельно от get_order — для чтений, обслуженных без него (304 по ETag из кэша).
+    """
+    if len(_recent_reads) < settings.order_cache_recent_reads_max:
+        _recent_reads[order_id_str] = time.time()
+    return record_order_read(order_id_str, hit=hit)
+
+
+async def get_order(
+    order_id: str | UUID, primary: Optional[Callable[[], Awaitable[bool]]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Заказ в виде записи кэша (L1 → Redis → БД) или None, если заказа нет.
+    Одновременные промахи по одному заказу склеиваются в одну загрузку,
+    горячие записи обновляются в фоне до истечения TTL.
+    Несуществующие id отсекаются negative cache и (если включён) Bloom-фильтром.
+    Заказ, прочитанный впервые (по оценке частоты), после промаха не кэшируется.
+    primary — проверка read-your-writes (только при промахе): True — грузить с primary.
+    """
+    order_id_str = str(order_id)
+    cached = await get_cached_order(order_id_str)
+    frequency = record_read(order_id_str, hit=cached is not None)
+    if cached is ORDER_NOT_FOUND:
+        return None
+    if cached is not None:
+        if should_refresh_early(cached):
+            _schedule_refresh(order_id_str)
+        return cached
+
+    if settings.order_bloom_enabled and await order_bloom.might_contain(UUID(order_id_str)) is False:
+        _stats["bloom_rejections"] += 1
+        return None
+
+    admit = admit_order(frequency)
+    if primary is not None and await primary():
+        # Отдельный ключ: не присоединяемся к загрузке с реплики
+        return await _flights.do(f"primary:{order_id_str}", lambda: _load(order_id_str, admit, primary=True))
+    return await _flights.do(order_id_str, lambda: _load(order_id_str, admit))
+
+
+async def flush_recent_reads() -> None:
+    """Один pipeline: ZADD накопленных чтений и обрезка ZSET до самых свежих"""
+    if not _recent_reads:
+        return
+    batch = dict(_recent_reads)
+    _recent_reads.clear()
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(RECENT_READS_KEY, batch)
+            pipe.zremrangebyrank(RECENT_READS_KEY, 0, -settings.order_cache_recent_reads_max - 1)
+            await pipe.execute()
+    except CircuitOpenError:
+        return
+    except Exception:
+        logger.error(f"Failed to flush {len(batch)} recent order reads", exc_info=True)
+
+
+async def get_recent_reads(limit: int) -> List[str]:
+    """Id недавно прочитанных заказов, от самых свежих"""
+    redis = await get_redis()
+    return await redis.zrevrange(RECENT_READS_KEY, 0, limit - 1)
+
+
+async def _flush_recent_reads_forever(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop.wait(), timeout=settings.order_cache_recent_reads_flush_seconds)
+        await flush_recent_reads()
+
+
+@asynccontextmanager
+async def lifespan_order_loader(app):
+    # startup
+    stop = asyncio.Event()
+    task = asyncio.create_task(_flush_recent_reads_forever(stop))
+    yield
+    # shutdown (последний сброс — внутри цикла)
+    stop.set()
+    await asyncio.wait({task}, timeout=5)
+    # Последняя попытка снять Bloom-фильтр с готовности: флаг живёт только в памяти
+    await order_bloom.invalidate_if_pending()
+
+
+async def add_orders_to_bloom(order_ids: Iterable[UUID]) -> None:
+    """Новые заказы — в Bloom-фильтр (пишем и до готовности фильтра, чтобы пересборка ничего не пропустила)"""
+    if settings.order_bloom_enabled:
+        await order_bloom.add_or_invalidate(order_ids)
+
+
+def order_loader_metrics() -> Dict[str, Any]:
+    """Счётчики загрузчика заказов (текущий воркер)"""
+    return {"single_flight": _flights.stats(), "recent_reads_buffered": len(_recent_reads), **_stats}
@@ -0,0 +1,216 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.db.models.order import Order, OrderStatus
+from src.db.redis.session import CircuitOpenError, get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# Роллапы заказов в Redis hash'ах:
+#   order_stats:hour:{YYYYMMDDHH}, order_stats:day:{YYYYMMDD}, order_stats:user:{user_id}
+# поля — "{status}:count" и "{status}:revenue" (выручка в копейках, целым числом).
+# Бакет определяется временем создания заказа, статус — текущим статусом заказа.
+STATS_PREFIX = "order_stats"
+GRANULARITIES = {
+    "hour": ("%Y%m%d%H", timedelta(hours=1)),
+    "day": ("%Y%m%d", timedelta(days=1)),
+}
+
+# Метка расхождения: сколько обновлений роллапов потеряно (Redis был недоступен).
+# Живёт под тем же префиксом — пересборка (clear_order_stats) снимает её вместе с роллапами
+DROPPED_UPDATES_KEY = f"{STATS_PREFIX}:dropped_updates"
+
+# Потерянные обновления, которые ещё не удалось записать в метку (текущий воркер)
+_pending_dropped = 0
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def bucket_key(granularity: str, moment: datetime) -> str:
+    fmt, _ = GRANULARITIES[granularity]
+    return f"{STATS_PREFIX}:{granularity}:{_utc(moment).strftime(fmt)}"
+
+
+def user_key(user_id: int) -> str:
+    return f"{STATS_PREFIX}:user:{user_id}"
+
+
+def to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+def _status_value(status: OrderStatus | str) -> str:
+    return status.value if isinstance(status, OrderStatus) else str(status)
+
+
+def _keys_for(order: Order) -> Tuple[str, str, str]:
+    return (
+        bucket_key("hour", order.created_at),
+        bucket_key("day", order.created_at),
+        user_key(order.user_id),
+    )
+
+
+def _queue_dropped(pipe) -> int:
+    """Дописывает в pipeline накопленные потери; возвращает, сколько дописано"""
+    dropped = _pending_dropped
+    if dropped:
+        pipe.incrby(DROPPED_UPDATES_KEY, dropped)
+    return dropped
+
+
+def _add_pending_dropped(count: int) -> None:
+    global _pending_dropped
+    _pending_dropped += count
+
+
+async def record_orders_created(orders: Iterable[Order]) -> None:
+    """
+    Учитывает новые заказы во всех роллапах одним pipeline.
+    Не записали — роллапы помечаются устаревшими (dropped_updates) до пересборки.
+    """
+    orders = list(orders)
+    if not orders:
+        return
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for order in orders:
+                status = _status_value(order.status)
+                for key in _keys_for(order):
+                    pipe.hincrby(key, f"{status}:count", 1)
+                    pipe.hincrby(key, f"{status}:revenue", to_cents(order.total_price))
+            flushed = _queue_dropped(pipe)
+            await pipe.execute()
+    except CircuitOpenError:
+        _add_pending_dropped(len(orders))
+        return
+    except Exception:
+        _add_pending_dropped(len(orders))
+        logger.error("Failed to record created orders in stats", exc_info=True)
+        return
+    _add_pending_dropped(-flushed)
+
+
+async def record_status_changes(changes: Iterable[Tuple[Order, OrderStatus]]) -> None:
+    """
+    Переносит заказы между статусами в роллапах.
+    changes — пары (заказ уже с новым статусом, предыдущий статус).
+    """
+    changes = [
+        (order, _status_value(previous_status), _status_value(order.status))
+        for order, previous_status in changes
+    ]
+    changes = [(order, old, new) for order, old, new in changes if old != new]
+    if not changes:
+        return
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for order, old, new in changes:
+                cents = to_cents(order.total_price)
+                for key in _keys_for(order):
+                    pipe.hincrby(key, f"{old}:count", -1)
+                    pipe.hincrby(key, f"{old}:revenue", -cents)
+                    pipe.hincrby(key, f"{new}:count", 1)
+                    pipe.hincrby(key, f"{new}:revenue", cents)
+            flushed = _queue_dropped(pipe)
+            await pipe.execute()
+    except CircuitOpenError:
+        _add_pending_dropped(len(changes))
+        return
+    except Exception:
+        _add_pending_dropped(len(changes))
+        logger.error("Failed to record status changes in stats", exc_info=True)
+        return
+    _add_pending_dropped(-flushed)
+
+
+def _parse_stats(raw: Dict[str, str]) -> Dict[str, Dict[str, float]]:
+    """{'paid:count': '3', 'paid:revenue': '1500'} -> {'paid': {'count': 3, 'revenue': 15.0}}"""
+    stats: Dict[str, Dict[str, float]] = {}
+    for field, value in raw.items():
+        status, _, metric = field.partition(":")
+        entry = stats.setdefault(status, {"count": 0, "revenue": 0.0})
+        if metric == "count":
+            entry["count"] = int(value)
+        elif metric == "revenue":
+            entry["revenue"] = int(value) / 100
+    return stats
+
+
+def bucket_starts(granularity: str, start: datetime, end: datetime) -> List[datetime]:
+    """Начала бакетов, пересекающихся с [start, end)"""
+    _, step = GRANULARITIES[granularity]
+    current = _utc(start).replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        current = current.replace(hour=0)
+
+    end = _utc(end)
+    starts = []
+    while current < end:
+        starts.append(current)
+        current += step
+    return starts
+
+
+def _dropped_updates(value: Optional[str]) -> int:
+    return int(value or 0) + _pending_dropped
+
+
+async def get_order_stats(
+    granularity: str, starts: List[datetime]
+) -> Tuple[List[Tuple[datetime, Dict[str, Dict[str, float]]]], int]:
+    """
+    Читает бакеты одним pipeline; время ответа не зависит от размера таблицы.
+    Второе значение — сколько обновлений роллапов потеряно с последней пересборки (0 — точные).
+    """
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.get(DROPPED_UPDATES_KEY)
+        for moment in starts:
+            pipe.hgetall(bucket_key(granularity, moment))
+        dropped, *rows = await pipe.execute()
+    buckets = [(moment, _parse_stats(raw)) for moment, raw in zip(starts, rows)]
+    return buckets, _dropped_updates(dropped)
+
+
+async def get_user_order_stats(user_id: int) -> Tuple[Dict[str, Dict[str, float]], int]:
+    """Итоги пользователя и число потерянных обновлений роллапов (см. get_order_stats)"""
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.get(DROPPED_UPDATES_KEY)
+        pipe.hgetall(user_key(user_id))
+        dropped, raw = await pipe.execute()
+    return _parse_stats(raw), _dropped_updates(dropped)
+
+
+async def clear_order_stats(batch_size: int = 1000) -> int:
+    """Удаляет все роллапы (перед пересборкой)"""
+    redis = await get_redis()
+    deleted = 0
+    batch: List[str] = []
+    async for key in redis.scan_iter(match=f"{STATS_PREFIX}:*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += await redis.delete(*batch)
+            batch = []
+    if batch:
+        deleted += await redis.delete(*batch)
+    return deleted
+
+
+async def write_stats(rows: Iterable[Tuple[str, str, int, int]]) -> None:
+    """Записывает готовые агрегаты: (ключ, статус, количество, выручка в копейках)"""
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, status, orders_count, revenue_cents in rows:
+            pipe.hincrby(key, f"{status}:count", orders_count)
+            pipe.hincrby(key, f"{status}:revenue", revenue_cents)
+        await pipe.execute()
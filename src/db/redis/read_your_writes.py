@@ -0,0 +1,34 @@
+import logging
+
+from src.core.config import settings
+from src.db.redis.session import CircuitOpenError, get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+def _writer_key(subject: str) -> str:
+    return f"db_writer:{subject}"
+
+
+async def mark_recent_writer(subject: str) -> None:
+    """Пользователь пишет: следующие db_read_your_writes_seconds его чтения идут на primary"""
+    try:
+        redis = await get_redis()
+        await redis.set(_writer_key(subject), "1", ex=settings.db_read_your_writes_seconds)
+    except CircuitOpenError:
+        return
+    except Exception:
+        logger.error(f"Failed to mark recent writer {subject}", exc_info=True)
+
+
+async def is_recent_writer(subject: str) -> bool:
+    """Писал ли пользователь недавно; если Redis недоступен — считаем, что писал (читаем с primary)"""
+    try:
+        redis = await get_redis()
+        return bool(await redis.exists(_writer_key(subject)))
+    except CircuitOpenError:
+        return True
+    except Exception:
+        logger.error(f"Failed to check recent writer {subject}", exc_info=True)
+        return True
@@ -1,77 +1,491 @@
-import json
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, Any
+import time
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from uuid import UUID
 
-from src.db.redis.session import get_redis
+from pydantic_core import to_jsonable_python
+from redis.exceptions import NoScriptError
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.etag import order_etag
+from src.db.redis.codec import get_codec
+from src.db.redis.hot_orders import is_hot_order, order_cache_ttl
+from src.db.redis.session import CircuitOpenError, get_redis, get_redis_binary
+from src.db.redis.user_cache import USER_INVALIDATION_PREFIX, clear_local_users, drop_local_user
 
 
 logger = logging.getLogger(__name__)
 
-async def cache_order(order_id: str | UUID, order_data: dict, ttl_seconds: int = 300) -> None:
+# L1: in-process кэш восстановленных заказов перед Redis (L2).
+# Используется, только пока воркер подписан на канал инвалидаций: без подписки
+# (Celery, команды, обрыв соединения) читаем сразу из Redis
+_local_orders: TTLCache[Dict[str, Any]] = TTLCache(
+    max_size=settings.order_cache_local_max_size,
+    ttl_seconds=settings.order_cache_local_ttl,
+)
+_local_enabled = False
+
+# Счётчики L2 (L1 считает сам TTLCache)
+# bypassed — Redis не спрашивали: предохранитель разомкнут
+_redis_stats = {"hits": 0, "misses": 0, "errors": 0, "bypassed": 0}
+
+
+# Версия формата записи: при изменении состава полей увеличиваем — старые ключи
+# просто перестают читаться и доживают свой TTL
+ORDER_CACHE_SCHEMA_VERSION = 2
+
+_codec = get_codec(settings.order_cache_codec)
+
+# Поля тела записи, кроме служебных expires_at/delta
+_PAYLOAD_FIELDS = ("id", "user_id", "items", "total_price", "status", "created_at", "updated_at", "version")
+
+# Заголовок "<version>\n" перед телом: ETag читается через GETRANGE без декодирования тела
+_HEADER_MAX_BYTES = 16
+
+# Запись не перетирает более новую версию заказа: иначе медленное чтение из БД,
+# начатое до смены статуса, могло бы вернуть в кэш устаревшую строку после write-through
+_SET_IF_NOT_OLDER_LUA = """
+local header = redis.call('GETRANGE', KEYS[1], 0, 15)
+local newline = string.find(header, '\\n', 1, true)
+if newline then
+    local current = tonumber(string.sub(header, 1, newline - 1))
+    if current and current > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+_SET_IF_NOT_OLDER_SHA = hashlib.sha1(_SET_IF_NOT_OLDER_LUA.encode("utf-8")).hexdigest()
+
+# Запись "заказа нет" (negative cache): заголовок с версией 0 без тела.
+# Версия 0 меньше любой настоящей — запись нового заказа её перезапишет
+ORDER_NOT_FOUND = object()
+_NOT_FOUND_ENTRY = b"0\n"
+
+
+def _order_key(order_id: str | UUID) -> str:
+    return f"order:v{ORDER_CACHE_SCHEMA_VERSION}:{_codec.name}:{order_id}"
+
+
+def _iso(value: Any) -> str:
+    """Даты храним ровно в том виде, в каком их отдаёт pydantic в JSON-ответе"""
+    return to_jsonable_python(value) if isinstance(value, datetime) else str(value or "")
+
+
+def _to_cache_payload(
+    order_id: str, order_data: dict, ttl_seconds: int, delta: float = 0.0
+) -> Dict[str, Any]:
     """
-    Сохраняет заказ в Redis как hash.
-    order_id может быть str или UUID.
+    Полная запись заказа из JSON-совместимых значений (в том виде, в каком её отдаёт
+    get_cached_order, без etag). expires_at и delta (сколько заняла загрузка из БД)
+    нужны для раннего обновления (XFetch).
     """
-    redis = await get_redis()
-    order_id_str = str(order_id)
+    status = order_data.get("status", "PENDING")
+    return {
+        "id": order_id,
+        "user_id": int(order_data["user_id"]),
+        "items": order_data.get("items") or [],
+        "total_price": float(order_data["total_price"]),
+        "status": status.value if isinstance(status, Enum) else status,
+        "created_at": _iso(order_data.get("created_at")),
+        "updated_at": _iso(order_data.get("updated_at")),
+        "version": int(order_data["version"]),
+        "expires_at": time.time() + ttl_seconds,
+        "delta": delta,
+    }
+
+
+def _encode_entry(payload: Dict[str, Any]) -> bytes:
+    return f"{payload['version']}\n".encode("ascii") + _codec.encode(payload)
+
+
+def _decode_entry(order_id: str, raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+    """
+    Байты из Redis -> запись с etag (или ORDER_NOT_FOUND);
+    битые и неполные записи считаем промахом
+    """
+    if not raw:
+        return None
+    if raw == _NOT_FOUND_ENTRY:
+        return ORDER_NOT_FOUND
+    try:
+        _, _, body = raw.partition(b"\n")
+        payload = _codec.decode(body)
+        if any(field not in payload for field in _PAYLOAD_FIELDS):
+            return None
+    except Exception:
+        logger.warning(f"Undecodable cache entry for order {order_id}", exc_info=True)
+        return None
+    return _with_etag(payload)
 
-    # Подготавливаем данные для хранения
-    data_to_cache = {
-        "user_id": str(order_data.get("user_id", 0)),
-        "items": json.dumps(order_data.get("items", [])),
-        "total_price": str(order_data.get("total_price", 0.0)),
-        "status": order_data.get("status", "PENDING"),
-        "created_at": str(order_data.get("created_at", "")),
+
+def _with_etag(payload: Dict[str, Any]) -> Dict[str, Any]:
+    payload["etag"] = order_etag(payload["version"])
+    return payload
+
+
+def _queue_set(pipe, order_id_str: str, entry: bytes, version: int, ttl_seconds: int) -> None:
+    pipe.evalsha(_SET_IF_NOT_OLDER_SHA, 1, _order_key(order_id_str), entry, version, ttl_seconds)
+
+
+async def _execute_set_pipeline(redis, queue: Callable[[Any], None]) -> List[Any]:
+    """
+    Pipeline с EVALSHA скрипта записи. Script из redis-py перед каждым execute()
+    проверяет скрипт отдельным SCRIPT EXISTS — лишний round trip на каждую запись.
+    Вместо этого на NOSCRIPT (перезапуск Redis, SCRIPT FLUSH) загружаем скрипт
+    и повторяем pipeline один раз: запись идемпотентна.
+    """
+    for attempt in range(2):
+        async with redis.pipeline(transaction=False) as pipe:
+            queue(pipe)
+            try:
+                return await pipe.execute()
+            except NoScriptError:
+                if attempt:
+                    raise
+        await redis.script_load(_SET_IF_NOT_OLDER_LUA)
+
+
+def order_cache_record(order_id: str | UUID, order_data: dict) -> Dict[str, Any]:
+    """Заказ в формате записи кэша (как из get_cached_order), но без записи в кэш"""
+    return _with_etag(_to_cache_payload(str(order_id), order_data, 0))
+
+
+def _local_get(order_id: str) -> Optional[Dict[str, Any]]:
+    return _local_orders.get(order_id) if _local_enabled else None
+
+
+def _local_set(
+    order_id: str, data: Optional[Dict[str, Any]], ttl_seconds: Optional[float] = None
+) -> None:
+    if _local_enabled and data is not None:
+        _local_orders.set(order_id, data, ttl_seconds=ttl_seconds, pinned=is_hot_order(order_id))
+
+
+def order_to_dict(order) -> Dict[str, Any]:
+    """ORM-объект заказа -> словарь для кэширования"""
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "items": order.items,
+        "total_price": order.total_price,
+        "status": order.status,
+        "created_at": order.created_at,
+        "updated_at": order.updated_at,
+        "version": order.version,
     }
 
-    key = f"order:{order_id_str}"
+
+async def cache_order(
+    order_id: str | UUID,
+    order_data: dict,
+    ttl_seconds: Optional[int] = None,
+    delta: float = 0.0,
+    notify: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Сохраняет заказ в Redis одной атомарной командой (SET ... EX, если в кэше нет версии новее).
+    order_id может быть str или UUID; TTL по умолчанию — по частоте чтений (order_cache_ttl).
+    notify=True — заказ изменился (write-through): L1 других воркеров получат инвалидацию.
+    Возвращает запись в том виде, в каком её отдаст get_cached_order.
+    """
+    order_id_str = str(order_id)
+    ttl_seconds = ttl_seconds or order_cache_ttl(order_id_str)
+    payload = _to_cache_payload(order_id_str, order_data, ttl_seconds, delta)
+    entry = _encode_entry(payload)
+    cached = _with_etag(payload)
 
     try:
-        await redis.hset(key, mapping=data_to_cache)
-        await redis.expire(key, ttl_seconds)
-        logger.debug(f"Order {order_id_str} cached (hash) with TTL {ttl_seconds}s")
+        def queue(pipe):
+            _queue_set(pipe, order_id_str, entry, payload["version"], ttl_seconds)
+            if notify:
+                pipe.publish(settings.order_cache_invalidation_channel, order_id_str)
+
+        redis = await get_redis_binary()
+        stored, *_ = await _execute_set_pipeline(redis, queue)
+        logger.debug(f"Order {order_id_str} cached ({len(entry)} bytes) with TTL {ttl_seconds}s")
+    except CircuitOpenError:
+        return cached
     except Exception as e:
         logger.error(f"Failed to cache order {order_id_str}", exc_info=True)
+        return cached
+
+    if notify:
+        _local_orders.pop(order_id_str)
+    if stored:
+        _local_set(order_id_str, cached)
+    return cached
+
+
+async def cache_orders(
+    orders: Iterable[dict], ttl_seconds: Optional[int] = None, notify: bool = False
+) -> None:
+    """Кэширует пачку заказов одним pipeline (условный SET ... EX на каждый, см. cache_order)"""
+    entries = {}
+    for order_data in orders:
+        order_id_str = str(order_data["id"])
+        entry_ttl = ttl_seconds or order_cache_ttl(order_id_str)
+        entries[order_id_str] = (_to_cache_payload(order_id_str, order_data, entry_ttl), entry_ttl)
+    if not entries:
+        return
+
+    try:
+        def queue(pipe):
+            for order_id_str, (payload, entry_ttl) in entries.items():
+                _queue_set(pipe, order_id_str, _encode_entry(payload), payload["version"], entry_ttl)
+            if notify:
+                pipe.publish(settings.order_cache_invalidation_channel, ",".join(entries))
+
+        redis = await get_redis_binary()
+        results = await _execute_set_pipeline(redis, queue)
+        logger.debug(f"{len(entries)} orders cached")
+    except CircuitOpenError:
+        return
+    except Exception:
+        logger.error("Failed to cache orders batch", exc_info=True)
+        return
+
+    for (order_id_str, (payload, _)), stored in zip(entries.items(), results):
+        if notify:
+            _local_orders.pop(order_id_str)
+        if stored:
+            _local_set(order_id_str, _with_etag(payload))
+
+
+async def cache_orders_not_found(order_ids: Iterable[str | UUID]) -> None:
+    """Запоминает на order_cache_negative_ttl, что заказов нет (не перетирает настоящие записи)"""
+    order_id_strs = [str(order_id) for order_id in order_ids]
+    if not order_id_strs:
+        return
+
+    ttl_seconds = settings.order_cache_negative_ttl
+    try:
+        def queue(pipe):
+            for order_id_str in order_id_strs:
+                _queue_set(pipe, order_id_str, _NOT_FOUND_ENTRY, 0, ttl_seconds)
+
+        redis = await get_redis_binary()
+        results = await _execute_set_pipeline(redis, queue)
+    except CircuitOpenError:
+        return
+    except Exception:
+        logger.error(f"Failed to cache {len(order_id_strs)} not found orders", exc_info=True)
+        return
+
+    for order_id_str, stored in zip(order_id_strs, results):
+        if stored:
+            _local_set(order_id_str, ORDER_NOT_FOUND, ttl_seconds=min(ttl_seconds, _local_orders.ttl_seconds))
 
 
 async def get_cached_order(order_id: str | UUID) -> Optional[Dict[str, Any]]:
     """
-    Получает заказ из Redis hash.
+    Получает заказ сначала из L1, затем из Redis.
     order_id может быть str или UUID.
-    Возвращает восстановленный словарь или None.
+    Возвращает запись (общую с L1 — не изменять), ORDER_NOT_FOUND или None при промахе.
     """
-    redis = await get_redis()
     order_id_str = str(order_id)
-    key = f"order:{order_id_str}"
+    cached = _local_get(order_id_str)
+    if cached is not None:
+        return cached
 
     try:
-        data = await redis.hgetall(key)
-        if not data:
-            return None
-
-        # Восстанавливаем типы
-        restored = {
-            "order_id": order_id_str,
-            "user_id": int(data.get("user_id", "0")),
-            "items": json.loads(data.get("items", "[]")),
-            "total_price": float(data.get("total_price", "0.0")),
-            "status": data.get("status", "PENDING"),
-            "created_at": data.get("created_at", ""),
-        }
-        return restored
-
+        redis = await get_redis_binary()
+        raw = await redis.get(_order_key(order_id_str))
+    except CircuitOpenError:
+        _redis_stats["bypassed"] += 1
+        return None
     except Exception as e:
+        _redis_stats["errors"] += 1
         logger.error(f"Error getting cached order {order_id_str}", exc_info=True)
         return None
 
+    cached = _decode_entry(order_id_str, raw)
+    _redis_stats["hits" if cached else "misses"] += 1
+    _local_set(order_id_str, cached)
+    return cached
+
+
+async def get_cached_order_etag(order_id: str | UUID) -> Optional[str]:
+    """Только ETag закэшированного заказа — из L1 или по заголовку записи (GETRANGE), без тела"""
+    cached = _local_get(str(order_id))
+    if cached is ORDER_NOT_FOUND:
+        return None
+    if cached is not None:
+        return cached["etag"]
+
+    try:
+        redis = await get_redis_binary()
+        header = await redis.getrange(_order_key(order_id), 0, _HEADER_MAX_BYTES - 1)
+    except CircuitOpenError:
+        _redis_stats["bypassed"] += 1
+        return None
+    except Exception:
+        _redis_stats["errors"] += 1
+        logger.error(f"Error getting cached etag for order {order_id}", exc_info=True)
+        return None
+
+    version, newline, _ = header.partition(b"\n")
+    if not newline or not version.isdigit():
+        _redis_stats["misses"] += 1
+        return None
+    _redis_stats["hits"] += 1
+    # Версия 0 — negative entry, ETag у несуществующего заказа нет
+    return order_etag(int(version)) if int(version) else None
+
+
+async def get_cached_orders(order_ids: Iterable[str | UUID]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Получает пачку заказов: сначала L1, остальное — одним MGET.
+    Возвращает {order_id: словарь, ORDER_NOT_FOUND или None}; при ошибке Redis промахи L1 — None.
+    """
+    result = {str(order_id): None for order_id in order_ids}
+    for order_id_str in result:
+        result[order_id_str] = _local_get(order_id_str)
+
+    remote_ids = [order_id_str for order_id_str, cached in result.items() if cached is None]
+    if not remote_ids:
+        return result
+
+    try:
+        redis = await get_redis_binary()
+        rows = await redis.mget([_order_key(order_id_str) for order_id_str in remote_ids])
+    except CircuitOpenError:
+        _redis_stats["bypassed"] += 1
+        return result
+    except Exception:
+        _redis_stats["errors"] += 1
+        logger.error("Error getting cached orders batch", exc_info=True)
+        return result
+
+    for order_id_str, raw in zip(remote_ids, rows):
+        cached = _decode_entry(order_id_str, raw)
+        _redis_stats["hits" if cached else "misses"] += 1
+        _local_set(order_id_str, cached)
+        result[order_id_str] = cached
+    return result
+
+
+async def _listen_invalidations(stop: asyncio.Event) -> None:
+    """
+    Подписка на канал инвалидаций: сообщение — id заказов через запятую
+    или "user:<email>" для кэша принципалов. Пока подписки нет, сообщения теряются —
+    поэтому L1 выключен и пуст до подписки и после любого обрыва.
+    """
+    global _local_enabled
+    delay = 1
+    while not stop.is_set():
+        pubsub = None
+        try:
+            redis = await get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(settings.order_cache_invalidation_channel)
+            _local_orders.clear()
+            clear_local_users()
+            _local_enabled = True
+            delay = 1
+            logger.info("Order cache invalidation listener subscribed")
+
+            # Короткий timeout: get_message может проглотить отмену задачи, флаг stop — нет
+            while not stop.is_set():
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                if message["data"].startswith(USER_INVALIDATION_PREFIX):
+                    drop_local_user(message["data"][len(USER_INVALIDATION_PREFIX):])
+                    continue
+                for order_id in message["data"].split(","):
+                    _local_orders.pop(order_id)
+        except Exception:
+            logger.warning("Order cache invalidation listener disconnected", exc_info=True)
+        finally:
+            _local_enabled = False
+            _local_orders.clear()
+            clear_local_users()
+            if pubsub is not None:
+                with suppress(Exception):
+                    await pubsub.aclose()
+
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+        delay = min(delay * 2, 30)
+
+
+@asynccontextmanager
+async def lifespan_order_cache(app):
+    # startup
+    stop = asyncio.Event()
+    task = asyncio.create_task(_listen_invalidations(stop))
+    yield
+    # shutdown
+    stop.set()
+    task.cancel()
+    await asyncio.wait({task}, timeout=5)
+
+
+def order_cache_metrics() -> Dict[str, Any]:
+    """Счётчики кэша заказов по уровням (текущий воркер)"""
+    return {
+        "l1": {"enabled": _local_enabled, **_local_orders.stats()},
+        "l2": dict(_redis_stats),
+    }
+
+# ======================
+# Счётчик заказов пользователя
+# ======================
+
+# INCRBY только для уже инициализированного счётчика: иначе он бы начался не с COUNT(*)
+_INCR_IF_EXISTS_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+
+def _user_orders_count_key(user_id: int) -> str:
+    return f"user_orders_count:{user_id}"
+
+
+async def get_user_orders_count(user_id: int) -> Optional[int]:
+    """Счётчик заказов пользователя или None, если он ещё не инициализирован"""
+    try:
+        redis = await get_redis()
+        value = await redis.get(_user_orders_count_key(user_id))
+        return int(value) if value is not None else None
+    except CircuitOpenError:
+        return None
+    except Exception:
+        logger.error(f"Error getting orders count for user {user_id}", exc_info=True)
+        return None
+
 
-async def invalidate_order_cache(order_id: str | UUID):
-    """Удалить заказ из кэша (например, после обновления статуса)"""
-    redis = await get_redis()
-    key = f"order:{order_id}"
-    deleted = await redis.delete(key)
-    if deleted:
-        logger.debug(f"Cache invalidated for order {order_id}")
-    else:
-        logger.debug(f"No cache to invalidate for order {order_id}")
\ No newline at end of file
+async def init_user_orders_count(user_id: int, count: int) -> None:
+    """
+    Инициализирует счётчик значением из БД (если его уже кто-то не создал).
+    TTL ограничивает возможный дрейф от гонки с параллельным созданием заказа.
+    """
+    try:
+        redis = await get_redis()
+        await redis.set(_user_orders_count_key(user_id), count, nx=True, ex=86400)
+    except CircuitOpenError:
+        return
+    except Exception:
+        logger.error(f"Failed to init orders count for user {user_id}", exc_info=True)
+
+
+async def incr_user_orders_count(user_id: int, amount: int = 1) -> None:
+    """Увеличивает счётчик после создания заказов"""
+    try:
+        redis = await get_redis()
+        await redis.eval(_INCR_IF_EXISTS_LUA, 1, _user_orders_count_key(user_id), amount)
+    except CircuitOpenError:
+        return
+    except Exception:
+        logger.error(f"Failed to increment orders count for user {user_id}", exc_info=True)
@@ -1,41 +1,144 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from typing import Optional
-from redis.asyncio import Redis, from_url
-from src.core.config import settings  # предполагается, что там есть REDIS_URL
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from src.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Глобальный клиент (инициализируется один раз)
+# Один предохранитель на оба клиента: сервер у них общий
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=settings.redis_breaker_failure_threshold,
+    open_seconds=settings.redis_breaker_open_seconds,
+    half_open_max_calls=settings.redis_breaker_half_open_max_calls,
+    failure_exceptions=(RedisConnectionError, RedisTimeoutError, asyncio.TimeoutError, OSError),
+)
+
+
+class _GuardedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        return await redis_breaker.call(super().execute, raise_on_error)
+
+
+class GuardedRedis(Redis):
+    """
+    Клиент, все команды и pipeline которого идут через redis_breaker:
+    при разомкнутом предохранителе сразу CircuitOpenError вместо таймаута.
+    Pub/sub не охраняется — у подписчика свой цикл переподключения.
+    """
+
+    async def execute_command(self, *args, **options):
+        return await redis_breaker.call(super().execute_command, *args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return _GuardedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+# Глобальные клиенты (инициализируются один раз)
 _redis_client: Optional[Redis] = None
+_redis_binary_client: Optional[Redis] = None
+_init_lock = asyncio.Lock()
 
 
-async def get_redis() -> Redis:
+def _make_client(decode_responses: bool, socket_timeout: float) -> Redis:
+    # Блокирующий пул: сверх max_connections ждём не дольше redis_pool_timeout, а не открываем новые
+    pool = BlockingConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+        decode_responses=decode_responses,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=settings.redis_socket_connect_timeout,
+        health_check_interval=settings.redis_health_check_interval,
+    )
+    return GuardedRedis(connection_pool=pool)
+
+
+async def init_redis() -> None:
     """
-    Получить или создать асинхронное подключение к Redis
+    Создаёт пулы обоих клиентов. Под локом: одновременные первые запросы
+    не создадут несколько пулов. Недоступный Redis не мешает старту —
+    им займётся предохранитель.
     """
-    global _redis_client
-    if _redis_client is None:
+    global _redis_client, _redis_binary_client
+    async with _init_lock:
+        if _redis_client is not None and _redis_binary_client is not None:
+            return
+        if _redis_client is None:
+            _redis_client = _make_client(True, settings.redis_socket_timeout)
+        if _redis_binary_client is None:
+            _redis_binary_client = _make_client(False, settings.redis_cache_socket_timeout)
+
         try:
-            _redis_client = await from_url(
-                settings.redis_url,
-                encoding="utf-8",
-                decode_responses=True,
-                socket_timeout=5,
-                socket_connect_timeout=5,
-            )
-            # Проверка подключения
             await _redis_client.ping()
-            logger.info("Redis connection established")
-        except Exception as e:
-            logger.error("Failed to connect to Redis", exc_info=True)
-            raise
+            logger.info(f"Redis connection pool ready (max {settings.redis_max_connections} connections)")
+        except Exception:
+            logger.error("Redis is unavailable, cache calls will be short-circuited", exc_info=True)
+
+
+async def get_redis() -> Redis:
+    """
+    Получить асинхронный клиент Redis (строки)
+    """
+    if _redis_client is None:
+        await init_redis()
     return _redis_client
 
 
+async def get_redis_binary() -> Redis:
+    """
+    Клиент без декодирования ответов — для бинарных значений (кэш заказов).
+    Отдельный пул: decode_responses задаётся на уровне соединения.
+    Таймаут короче — на промахе кэша выгоднее сразу пойти в БД
+    """
+    if _redis_binary_client is None:
+        await init_redis()
+    return _redis_binary_client
+
+
+def redis_available() -> bool:
+    """False — предохранитель разомкнут, в Redis сейчас не ходим"""
+    return not redis_breaker.is_open
+
+
 async def close_redis():
-    """Закрыть соединение при завершении приложения"""
-    global _redis_client
+    """Закрыть соединения при завершении приложения"""
+    global _redis_client, _redis_binary_client
     if _redis_client is not None:
-        await _redis_client.close()
+        await _redis_client.aclose(close_connection_pool=True)
         _redis_client = None
-        logger.info("Redis connection closed")
\ No newline at end of file
+        logger.info("Redis connection closed")
+    if _redis_binary_client is not None:
+        await _redis_binary_client.aclose(close_connection_pool=True)
+        _redis_binary_client = None
+        logger.info("Redis binary connection closed")
+
+
+@asynccontextmanager
+async def lifespan_redis(app):
+    # startup
+    await init_redis()
+    yield
+    # shutdown
+    await close_redis()
+
+
+def redis_metrics() -> dict:
+    """Состояние предохранителя и занятость пулов (текущий воркер)"""
+    pools = {}
+    for name, client in (("str", _redis_client), ("binary", _redis_binary_client)):
+        if client is not None:
+            pool = client.connection_pool
+            pools[name] = {
+                "max_connections": pool.max_connections,
+                "in_use": len(pool._in_use_connections),
+            }
+    return {"breaker": redis_breaker.stats(), "pools": pools}
+
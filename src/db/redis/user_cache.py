@@ -0,0 +1,151 @@
+import logging
+from typing import Optional
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.db.models.user import User
+from src.db.redis.session import CircuitOpenError, get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# Локальный (на воркер) кэш поверх Redis: ключ — subject токена (email)
+_local_users: TTLCache[dict] = TTLCache(
+    max_size=settings.user_cache_local_max_size,
+    ttl_seconds=settings.user_cache_local_ttl,
+)
+
+# Инвалидации принципалов идут в канал инвалидаций кэша заказов с этим префиксом
+USER_INVALIDATION_PREFIX = "user:"
+
+# Запись принципала одной командой (hash и TTL атомарно). Не пишем, пока жива метка
+# инвалидации: запрос, прочитавший пользователя из БД до изменения, не вернёт старые права
+_SET_USER_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'id', ARGV[1], 'email', ARGV[2], 'is_active', ARGV[3], 'is_admin', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+_set_user_script = None
+
+
+def _user_key(email: str) -> str:
+    return f"user:{email}"
+
+
+def _invalidated_key(email: str) -> str:
+    return f"user_invalidated:{email}"
+
+
+def _to_user(data: dict) -> User:
+    """Собирает transient-объект User (не привязан к сессии, без hashed_password)"""
+    return User(
+        id=data["id"],
+        email=data["email"],
+        is_active=data["is_active"],
+        is_admin=data["is_admin"],
+    )
+
+
+async def cache_user(user: User) -> None:
+    """
+    Кладёт принципала в Redis hash и в локальный кэш. Сразу после инвалидации
+    (user_cache_invalidation_guard_seconds) не кэширует: данные могли быть прочитаны до изменения.
+    """
+    global _set_user_script
+    data = {
+        "id": user.id,
+        "email": user.email,
+        "is_active": user.is_active,
+        "is_admin": user.is_admin,
+    }
+
+    try:
+        redis = await get_redis()
+        if _set_user_script is None:
+            _set_user_script = redis.register_script(_SET_USER_LUA)
+        stored = await _set_user_script(
+            keys=[_user_key(user.email), _invalidated_key(user.email)],
+            args=[
+                user.id,
+                user.email,
+                "1" if user.is_active else "0",
+                "1" if user.is_admin else "0",
+                settings.user_cache_ttl,
+            ],
+            client=redis,
+        )
+    except CircuitOpenError:
+        stored = None
+    except Exception:
+        logger.error(f"Failed to cache user {user.email}", exc_info=True)
+        stored = None
+
+    # 0 — жива метка инвалидации. Без Redis (None) метку не проверить:
+    # устаревание локальной записи ограничено user_cache_local_ttl
+    if stored != 0:
+        _local_users.set(user.email, data)
+
+
+async def get_cached_user(email: str) -> Optional[User]:
+    """
+    Ищет принципала сначала в локальном кэше, затем в Redis.
+    Возвращает None при промахе или недоступности Redis.
+    """
+    data = _local_users.get(email)
+    if data is not None:
+        return _to_user(data)
+
+    try:
+        redis = await get_redis()
+        raw = await redis.hgetall(_user_key(email))
+    except CircuitOpenError:
+        return None
+    except Exception:
+        logger.error(f"Error getting cached user {email}", exc_info=True)
+        return None
+
+    if not raw:
+        return None
+
+    data = {
+        "id": int(raw["id"]),
+        "email": raw["email"],
+        "is_active": raw.get("is_active") == "1",
+        "is_admin": raw.get("is_admin") == "1",
+    }
+    _local_users.set(email, data)
+    return _to_user(data)
+
+
+def drop_local_user(email: str) -> None:
+    """Инвалидация из канала: убрать принципала из локального кэша воркера"""
+    _local_users.pop(email)
+
+
+def clear_local_users() -> None:
+    """Подписка на канал потеряна: без инвалидаций локальному кэшу не доверяем"""
+    _local_users.clear()
+
+
+async def invalidate_cached_user(email: str) -> None:
+    """
+    Удаляет принципала из кэша (например, после смены is_active / is_admin), ставит
+    метку инвалидации и рассылает её локальным кэшам других воркеров через pub/sub.
+    Если сообщение потерялось, они догоняют в пределах user_cache_local_ttl.
+    """
+    _local_users.pop(email)
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.delete(_user_key(email))
+            pipe.set(_invalidated_key(email), "1", ex=settings.user_cache_invalidation_guard_seconds)
+            pipe.publish(settings.order_cache_invalidation_channel, f"{USER_INVALIDATION_PREFIX}{email}")
+            await pipe.execute()
+        logger.debug(f"Cache invalidated for user {email}")
+    except CircuitOpenError:
+        return
+    except Exception:
+        logger.error(f"Failed to invalidate cached user {email}", exc_info=True)
@@ -0,0 +1,244 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.core.config import settings
+from src.core.singleflight import SingleFlight
+from src.db.dao.orders_dao import OrderDAO
+from src.db.dao.pagination import decode_cursor, encode_cursor
+from src.db.models.order import Order
+from src.db.redis.redis_utils import (
+    ORDER_NOT_FOUND,
+    cache_orders,
+    get_cached_orders,
+    order_cache_record,
+    order_to_dict,
+)
+from src.db.redis.session import CircuitOpenError, get_redis
+from src.db.session import async_read_session
+
+
+logger = logging.getLogger(__name__)
+
+# Read model списка заказов пользователя: ZSET user_orders:<user_id>,
+# member — id заказа, score — created_at (unix time). Сами заказы — в кэше заказов.
+# Членство в списке не меняется при смене статуса, поэтому ZSET пополняется только при создании,
+# а свежесть полей даёт write-through записей заказов.
+#
+# Служебный member "ready" со score +inf — признак полного набора: без него (ключ создан
+# добавлением нового заказа или вытеснен) список читается из БД и пересобирается.
+# Признак живёт в том же ключе — вытеснение не оставит "готовый" пустой список.
+USER_ORDERS_PREFIX = "user_orders"
+_READY_MEMBER = "ready"
+
+# Страница одной командой: nil — набор не готов, {-1} — курсора нет в наборе,
+# иначе {число заказов, id заказов (limit + 1, чтобы понять, есть ли следующая страница)}.
+# Равные score Redis отдаёт в обратном лексикографическом порядке id — как id DESC в БД
+_PAGE_LUA = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[3]) then
+    return nil
+end
+local start = 1
+if ARGV[1] ~= '' then
+    local rank = redis.call('ZREVRANK', KEYS[1], ARGV[1])
+    if not rank then
+        return {-1}
+    end
+    start = rank + 1
+end
+local ids = redis.call('ZREVRANGE', KEYS[1], start, start + tonumber(ARGV[2]))
+return {redis.call('ZCARD', KEYS[1]) - 1, ids}
+"""
+_page_script = None
+
+# Одна пересборка на пользователя в пределах процесса
+_rebuilds: SingleFlight[None] = SingleFlight()
+
+# Пользователи, чьи новые заказы не удалось добавить в список: их списки нужно снять
+# с готовности, как только Redis снова доступен, иначе список отдаётся без этих заказов.
+# Множество живёт в памяти воркера; если он перезапустится раньше, неполный список доживёт
+# до TTL: добавления его не продлевают, TTL отсчитывается от пересборки
+_failed_users: Set[int] = set()
+
+_stats = {"hits": 0, "not_ready": 0, "rebuilds": 0, "order_misses": 0, "errors": 0, "invalidated": 0}
+
+
+def user_orders_key(user_id: int) -> str:
+    return f"{USER_ORDERS_PREFIX}:{user_id}"
+
+
+def _score(created_at: datetime) -> float:
+    return created_at.timestamp()
+
+
+async def _invalidate_failed_users() -> None:
+    """Снимает признак готовности со списков, в которые не попали новые заказы"""
+    if not _failed_users:
+        return
+    user_ids = list(_failed_users)
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.zrem(user_orders_key(user_id), _READY_MEMBER)
+            await pipe.execute()
+    except CircuitOpenError:
+        return
+    except Exception:
+        logger.error(f"Failed to invalidate {len(user_ids)} user order lists", exc_info=True)
+        return
+    _failed_users.difference_update(user_ids)
+    _stats["invalidated"] += len(user_ids)
+
+
+async def add_user_orders(user_id: int, orders: Iterable[Tuple[UUID, datetime]]) -> None:
+    """
+    Новые заказы — в список пользователя. Пишем и в неготовый набор: пересборка
+    добавляет к нему снимок из БД, и заказ, созданный во время пересборки, не потеряется.
+    Не записали — список снимается с готовности, как только Redis снова ответит.
+    TTL ставится только новому ключу: продлевает его лишь пересборка из БД.
+    """
+    mapping = {str(order_id): _score(created_at) for order_id, created_at in orders}
+    if not mapping or not settings.user_orders_read_model_enabled:
+        return
+    await _invalidate_failed_users()
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(user_orders_key(user_id), mapping)
+            pipe.expire(user_orders_key(user_id), settings.user_orders_read_model_ttl, nx=True)
+            await pipe.execute()
+    except CircuitOpenError:
+        _failed_users.add(user_id)
+    except Exception:
+        _failed_users.add(user_id)
+        logger.error(f"Failed to add {len(mapping)} orders to user {user_id} list", exc_info=True)
+
+
+async def store_user_orders(
+    user_orders: Dict[int, Iterable[Tuple[UUID, datetime]]], mark_ready: bool = True
+) -> None:
+    """Снимок из БД для нескольких пользователей одним pipeline; mark_ready — набор полон"""
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        for user_id, orders in user_orders.items():
+            key = user_orders_key(user_id)
+            mapping = {str(order_id): _score(created_at) for order_id, created_at in orders}
+            if mark_ready:
+                mapping[_READY_MEMBER] = float("inf")
+            if mapping:
+                pipe.zadd(key, mapping)
+            pipe.expire(key, settings.user_orders_read_model_ttl)
+        await pipe.execute()
+
+
+async def mark_user_orders_ready(user_ids: Iterable[int]) -> None:
+    await store_user_orders({user_id: () for user_id in user_ids}, mark_ready=True)
+
+
+async def clear_user_orders(batch_size: int = 1000) -> int:
+    """Удаляет все списки (перед полной пересборкой)"""
+    redis = await get_redis()
+    deleted = 0
+    batch: List[str] = []
+    async for key in redis.scan_iter(match=f"{USER_ORDERS_PREFIX}:*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += await redis.delete(*batch)
+            batch = []
+    if batch:
+        deleted += await redis.delete(*batch)
+    return deleted
+
+
+async def _rebuild(user_id: int, session_factory: async_sessionmaker) -> None:
+    _stats["rebuilds"] += 1
+    async with session_factory() as session:
+        keys = await OrderDAO(Order, session).get_user_order_keys(user_id)
+    await store_user_orders({user_id: keys})
+
+
+async def _page_ids(user_id: int, limit: int, cursor_id: str) -> Optional[list]:
+    global _page_script
+    redis = await get_redis()
+    if _page_script is None:
+        _page_script = redis.register_script(_PAGE_LUA)
+    return await _page_script(
+        keys=[user_orders_key(user_id)],
+        args=[cursor_id, limit, _READY_MEMBER],
+        client=redis,
+    )
+
+
+async def _fill_misses(
+    order_ids: List[str], session_factory: async_sessionmaker
+) -> Dict[str, Dict[str, Any]]:
+    """Заказы, выпавшие из кэша, — одним запросом из БД и обратно в кэш"""
+    _stats["order_misses"] += len(order_ids)
+    async with session_factory() as session:
+        db_orders = await OrderDAO(Order, session).get_many(
+            [UUID(order_id) for order_id in order_ids]
+        )
+    orders = [order_to_dict(order) for order in db_orders]
+    await cache_orders(orders)
+    return {str(order["id"]): order_cache_record(order["id"], order) for order in orders}
+
+
+async def read_user_orders_page(
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    session_factory: async_sessionmaker = async_read_session,
+) -> Optional[Tuple[List[Dict[str, Any]], Optional[str], int]]:
+    """
+    Страница заказов пользователя из Redis (от новых к старым): (записи кэша заказов,
+    next_cursor, всего заказов). Курсоры совместимы с OrderDAO.get_user_orders_page.
+    Неготовый набор пересобирается из БД; None — читать из БД (Redis недоступен,
+    курсор указывает на заказ вне набора). Битый курсор — ValueError.
+    session_factory — откуда читать БД (после записи пользователя — primary, см. session_factory_for).
+    """
+    if not settings.user_orders_read_model_enabled:
+        return None
+    cursor_id = str(decode_cursor(cursor)[1]) if cursor else ""
+
+    await _invalidate_failed_users()
+    if user_id in _failed_users:
+        # Список ещё не снят с готовности и может быть неполным
+        return None
+    try:
+        page = await _page_ids(user_id, limit, cursor_id)
+        if page is None:
+            _stats["not_ready"] += 1
+            await _rebuilds.do(user_id, lambda: _rebuild(user_id, session_factory))
+            page = await _page_ids(user_id, limit, cursor_id)
+    except CircuitOpenError:
+        return None
+    except Exception:
+        _stats["errors"] += 1
+        logger.error(f"Failed to read orders list of user {user_id}", exc_info=True)
+        return None
+    if page is None or page[0] == -1:
+        return None
+
+    total, ids = page
+    page_ids = ids[:limit]
+    cached = await get_cached_orders(page_ids)
+    misses = [order_id for order_id, entry in cached.items() if entry is None or entry is ORDER_NOT_FOUND]
+    if misses:
+        cached.update(await _fill_misses(misses, session_factory))
+
+    orders = [cached[order_id] for order_id in page_ids if isinstance(cached.get(order_id), dict)]
+    next_cursor = None
+    if len(ids) > limit and orders:
+        last = orders[-1]
+        next_cursor = encode_cursor(datetime.fromisoformat(last["created_at"]), UUID(last["id"]))
+    _stats["hits"] += 1
+    return orders, next_cursor, total
+
+
+def user_orders_metrics() -> Dict[str, Any]:
+    """Счётчики read model списков заказов (текущий воркер)"""
+    return {**_stats, "pending_invalidations": len(_failed_users)}
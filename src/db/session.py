@@ -1,30 +1,100 @@
+from typing import Optional
+
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from src.core.config import settings
+from src.core.security import decode_token
+from src.db.redis.read_your_writes import is_recent_writer, mark_recent_writer
 
 # ── Настройки ────────────────────────────────────────────────
 DATABASE_URL = settings.database_url
 
-# Создаём движок
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,                     # True → будет показывать все SQL-запросы
-    future=True,
-    pool_pre_ping=True,             # проверяет соединение перед выдачей из пула
-    pool_size=5,
-    max_overflow=10,
+# Методы, которые только читают: их можно отправлять на реплику
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=False,                     # True → будет показывать все SQL-запросы
+        future=True,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        # Кэш prepared statements драйвера (на соединение): повторные запросы без повторного PREPARE
+        connect_args={"prepared_statement_cache_size": settings.db_statement_cache_size},
+    )
+
+
+# Создаём движки: primary и (если задана) реплика для чтения
+engine = _create_engine(DATABASE_URL)
+replica_engine = (
+    _create_engine(settings.database_replica_url) if settings.database_replica_url else None
 )
 
 
-# Фабрика сессий (самый удобный способ)
+# Фабрики сессий (самый удобный способ)
 async_session = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
-async def get_db() -> AsyncSession:
-    async with async_session() as session:
-        yield session
+# Только для чтения; без реплики — тот же primary
+async_read_session = async_sessionmaker(
+    replica_engine or engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 
+def _request_subject(request: Request) -> Optional[str]:
+    """Пользователь из Bearer-токена (без похода в БД) — для read-your-writes"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
 
+
+async def _session_factory(request: Request) -> async_sessionmaker:
+    """
+    Чтения (GET/HEAD) — на реплику, остальное — на primary.
+    После записи пользователь db_read_your_writes_seconds читает с primary,
+    чтобы увидеть свои изменения несмотря на отставание реплики.
+    """
+    if replica_engine is None:
+        return async_session
+
+    if request.method not in READ_METHODS:
+        subject = _request_subject(request)
+        if subject:
+            # До выполнения запроса: чтение сразу после ответа уже увидит метку
+            await mark_recent_writer(subject)
+        return async_session
+
+    if await reads_from_primary(request):
+        return async_session
+    return async_read_session
+
+
+async def reads_from_primary(request: Request) -> bool:
+    """Чтение, которое должно идти на primary: пользователь недавно писал"""
+    if replica_engine is None:
+        return False
+    subject = _request_subject(request)
+    return bool(subject) and await is_recent_writer(subject)
+
+
+def session_factory_for(session: AsyncSession) -> async_sessionmaker:
+    """Фабрика на движке сессии запроса: свои сессии читают оттуда же, что и запрос"""
+    return async_session if session.bind is engine else async_read_session
+
+
+async def get_db(request: Request) -> AsyncSession:
+    factory = await _session_factory(request)
+    async with factory() as session:
+        yield session
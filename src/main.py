@@ -1,12 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from starlette.responses import HTMLResponse
 
+from src.api.router.endponts.admin import router_admin
 from src.api.router.endponts.auth import router_auth
 from src.api.router.endponts.orders import router_order
 from src.core.kafka import lifespan_producer
+from src.core.security import password_hasher
+from src.db.redis.order_loader import lifespan_order_loader
+from src.db.redis.redis_utils import lifespan_order_cache
+from src.db.redis.session import lifespan_redis
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Redis — первым: закрывается после фоновых задач, которые им пользуются
+    async with (
+        lifespan_redis(app),
+        lifespan_producer(app),
+        lifespan_order_cache(app),
+        lifespan_order_loader(app),
+    ):
+        yield
+    # shutdown
+    password_hasher.shutdown()
+
 
 app = FastAPI(
-    lifespan=lifespan_producer,
+    lifespan=lifespan,
     title="Сервис управления заказами",
     description="Тестовое задание: FastAPI + PostgreSQL + Redis + Kafka + Celery",
     version="1.0.0",
@@ -30,3 +52,4 @@ async def root():
 
 app.include_router(router_auth, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(router_order, prefix="/api/v1/orders", tags=["orders"])
+app.include_router(router_admin, prefix="/api/v1", tags=["admin"])
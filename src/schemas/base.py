@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, ConfigDict, validator, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, field_validator, EmailStr
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import uuid
@@ -37,18 +37,6 @@ class OrderItemBase(BaseModel):
     quantity: int = Field(gt=0)
     price: float = Field(gt=0)
 
-    @validator('quantity')
-    def validate_quantity(cls, v):
-        if v <= 0:
-            raise ValueError('Quantity must be greater than 0')
-        return v
-
-    @validator('price')
-    def validate_price(cls, v):
-        if v <= 0:
-            raise ValueError('Price must be greater than 0')
-        return v
-
 
 class OrderBase(BaseModel):
     """Базовая схема заказа"""
@@ -56,7 +44,8 @@ class OrderBase(BaseModel):
 
     status: OrderStatus = OrderStatus.PENDING
 
-    @validator('items')
+    @field_validator('items')
+    @classmethod
     def validate_items(cls, v):
         if not v:
             raise ValueError('Order must contain at least one item')
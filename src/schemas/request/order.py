@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
+from uuid import UUID
 
 from src.schemas.base import OrderBase, OrderStatus, OrderItemBase
 from src.schemas.response.order import OrderItemResponse
@@ -26,4 +27,22 @@ class OrderCreateRequest(OrderBase):
 
 class OrderUpdateRequest(BaseModel):
     """Схема для обновления статуса заказа (запрос)"""
-    status: Optional[OrderStatus] = None
\ No newline at end of file
+    status: Optional[OrderStatus] = None
+
+
+class OrderBatchCreateRequest(BaseModel):
+    """
+    Схема пакетного создания заказов (запрос).
+    Элементы валидируются по одному, чтобы вернуть результат для каждого.
+    """
+    orders: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
+
+class OrderBulkStatusUpdate(BaseModel):
+    """Схема массового обновления статуса заказов (запрос)"""
+    order_ids: List[UUID] = Field(..., min_length=1)
+    status: OrderStatus = Field(
+        ...,
+        description="Новый статус заказов"
+    )
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Dict, List, Literal
+
+from pydantic import BaseModel
+
+
+class StatusStats(BaseModel):
+    """Количество и выручка заказов в одном статусе"""
+    count: int = 0
+    revenue: float = 0.0
+
+
+class OrderStatsBucket(BaseModel):
+    """Агрегаты за один час/день (по времени создания заказов)"""
+    bucket: datetime
+    statuses: Dict[str, StatusStats]
+
+
+class OrderStatsResponse(BaseModel):
+    """Схема ответа с роллапами заказов"""
+    granularity: Literal["hour", "day"]
+    buckets: List[OrderStatsBucket]
+    stale: bool = False           # часть обновлений роллапов потеряна — нужна пересборка
+    dropped_updates: int = 0
+
+
+class UserOrderStatsResponse(BaseModel):
+    """Схема ответа с итогами по заказам пользователя"""
+    user_id: int
+    statuses: Dict[str, StatusStats]
+    total_count: int
+    total_revenue: float
+    stale: bool = False
+    dropped_updates: int = 0
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, ConfigDict, computed_field
-from typing import List
+from typing import List, Optional
+from uuid import UUID
 
 from src.schemas.base import OrderInDB, OrderItemBase
 
@@ -23,8 +24,38 @@ class OrderResponse(OrderInDB):
 
 
 class OrderListResponse(BaseModel):
-    """Схема списка заказов в ответе API"""
+    """Схема страницы заказов в ответе API (keyset-пагинация)"""
     orders: List[OrderResponse]
-    total: int
-    page: int
-    size: int
\ No newline at end of file
+    size: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+class OrderBatchItemResult(BaseModel):
+    """Результат создания одного заказа из пакета"""
+    index: int
+    success: bool
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+
+class OrderBatchCreateResponse(BaseModel):
+    """Схема ответа на пакетное создание заказов"""
+    results: List[OrderBatchItemResult]
+    created: int
+    failed: int
+
+
+
+class OrderBulkStatusUpdateResponse(BaseModel):
+    """Схема ответа на массовое обновление статуса"""
+    updated: List[OrderResponse]
+    missing: List[UUID]
+    rejected: List[UUID]
+
+
+
+class OrderMultiGetResponse(BaseModel):
+    """Схема ответа на получение заказов по списку id"""
+    orders: List[OrderResponse]
+    missing: List[UUID]
@@ -0,0 +1,63 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from starlette.responses import Response
+
+from src.schemas.response.order import OrderResponse, OrderListResponse
+
+# Адаптеры собираются один раз при импорте, а не на каждый запрос
+ORDER_ADAPTER = TypeAdapter(OrderResponse)
+ORDER_LIST_ADAPTER = TypeAdapter(list[OrderResponse])
+ORDER_PAGE_ADAPTER = TypeAdapter(OrderListResponse)
+
+# Порядок полей как в OrderResponse
+ORDER_FIELDS = ("items", "status", "total_price", "id", "user_id", "created_at", "updated_at")
+
+
+class JSONBytesResponse(Response):
+    """Ответ с уже готовыми JSON-байтами: FastAPI не перевалидирует и не перекодирует их"""
+    media_type = "application/json"
+
+
+def dump_order(order: Any) -> bytes:
+    """ORM-объект или модель заказа -> JSON (валидация + сериализация в pydantic-core)"""
+    return ORDER_ADAPTER.dump_json(ORDER_ADAPTER.validate_python(order, from_attributes=True))
+
+
+def dump_orders(orders: Iterable[Any]) -> bytes:
+    return ORDER_LIST_ADAPTER.dump_json(
+        ORDER_LIST_ADAPTER.validate_python(list(orders), from_attributes=True)
+    )
+
+
+def dump_order_page(page: Dict[str, Any]) -> bytes:
+    return ORDER_PAGE_ADAPTER.dump_json(
+        ORDER_PAGE_ADAPTER.validate_python(page, from_attributes=True)
+    )
+
+
+def _cached_order_payload(cached: Dict[str, Any]) -> Dict[str, Any]:
+    payload = {field: cached[field] for field in ORDER_FIELDS}
+    payload["items_count"] = len(cached["items"]) if cached["items"] else 0
+    return payload
+
+
+def dump_cached_order(cached: Dict[str, Any]) -> bytes:
+    """
+    Заказ из нашего же кэша уже прошёл валидацию при записи —
+    собираем JSON напрямую, без повторного построения модели.
+    """
+    return to_json(_cached_order_payload(cached))
+
+
+def dump_cached_order_page(
+    orders: List[Dict[str, Any]], next_cursor: Optional[str], total: Optional[int]
+) -> bytes:
+    """Страница из записей кэша заказов — в том же виде, что и dump_order_page"""
+    return to_json({
+        "orders": [_cached_order_payload(cached) for cached in orders],
+        "size": len(orders),
+        "next_cursor": next_cursor,
+        "total": total,
+    })